@@ -0,0 +1,9 @@
+"""Observable data loader for the EU Institutions chart (see scripts/loaders.py)."""
+
+import logging
+
+from scripts.loaders import load, write_stdout
+from scripts.logger import configure_logging
+
+configure_logging(logging.INFO)
+write_stdout(load("eui_spending_chart"))
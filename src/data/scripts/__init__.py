@@ -0,0 +1,7 @@
+import pandas as pd
+
+# The analysis runs under Copy-on-Write (the default from pandas 3): frames derived
+# from another frame never share mutable data with it, so defensive copies are not
+# needed.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
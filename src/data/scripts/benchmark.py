@@ -0,0 +1,409 @@
+"""Offline benchmarks for the ms_analysis and eu_institutions pipelines.
+
+Every stage runs against the deterministic fixtures in scripts.fixtures, so no
+remote source is needed. Run from src/data, for example:
+
+    python -m scripts.benchmark --donors 27 --years 10 --scenarios 8 --save
+    python -m scripts.benchmark --baseline ../../benchmarks/baseline.json
+    python -m scripts.benchmark --scaling --repeat 1
+    python -m scripts.benchmark --check --stage none   # run the tests only
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from scripts import cache, common, horizon
+from scripts.config import Paths
+from scripts.eu_institutions import eui_spending_chart
+from scripts.fixtures import Fixtures, use_fixtures
+from scripts.logger import configure_logging
+from scripts.ms_analysis import (
+    fetch_projection_inputs,
+    main_column_chart_with_projections,
+)
+from scripts.prefetch import prefetch
+from scripts.scenarios import scenario_sweep
+from scripts.tools import to_constant
+from scripts.service import ScenarioService
+from scripts.uncertainty import monte_carlo_mff_totals
+from scripts.variants import chart_variants
+
+logger = logging.getLogger(__name__)
+
+# Modules that importing the analysis must not load
+HEAVY_MODULES = ("bblocks", "oda_data", "oda_reader", "pydeflate", "pyarrow.dataset")
+
+# Peak memory allowed for main_column_chart_with_projections at MEMORY_BUDGET_DONORS
+MEMORY_BUDGET_MB = 64.0
+MEMORY_BUDGET_DONORS = 5_000
+
+# Donor and year counts of the scaling benchmark (all donors projected as DAC
+# members), and the largest growth exponent of time in donors x years allowed
+SCALING_DONORS = (30, 120, 480, 1920)
+SCALING_YEARS = (10, 20)
+SCALING_MAX_EXPONENT = 1.2
+
+IMPORT_TIME_MODULES = (
+    "scripts.tools",
+    "scripts.ms_analysis",
+    "scripts.eu_institutions",
+)
+
+
+def import_time(module: str, preload: tuple[str, ...] = ("numpy", "pandas")) -> dict:
+    """Measure how long importing a module takes, in a fresh interpreter where
+    the preloaded packages are already imported.
+
+    Returns:
+        dict: Import time (ms) and the heavy modules the import loaded.
+    """
+    code = (
+        "import json, sys, time\n"
+        f"import {', '.join(preload)}\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = 1000 * (time.perf_counter() - start)\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'import_ms': elapsed, 'heavy_loaded': heavy}))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Paths.app_data,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {"module": module, **json.loads(result.stdout.splitlines()[-1])}
+
+
+def check_import_times(budget_ms: float = 100.0) -> pd.DataFrame:
+    """Measure the import time of the analysis modules and flag any that exceed
+    the budget or load one of the heavy data packages."""
+    times = pd.DataFrame([import_time(module) for module in IMPORT_TIME_MODULES])
+    times["over_budget"] = (times.import_ms > budget_ms) | (
+        times.heavy_loaded.str.len() > 0
+    )
+    return times
+
+
+def check_memory_budget(
+    donors: int = MEMORY_BUDGET_DONORS, budget_mb: float = MEMORY_BUDGET_MB
+) -> dict:
+    """Trace the peak memory of main_column_chart_with_projections, from cold
+    caches, against fixtures with many donors, and flag it if it exceeds the
+    budget."""
+    with use_fixtures(Fixtures(donors=donors)):
+        _cold_caches()
+        tracemalloc.start()
+        main_column_chart_with_projections()
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    return {
+        "donors": donors,
+        "peak_memory_mb": peak,
+        "budget_mb": budget_mb,
+        "over_budget": peak > budget_mb,
+    }
+
+
+def _cold_caches() -> None:
+    cache.oda_cache.clear()
+    cache.weo_cache.clear(disk=True)
+    horizon.max_data_year.cache_clear()
+
+
+def measure(func: Callable, repeat: int = 3) -> dict:
+    """Run a function several times, from cold caches, and record its wall time.
+    Peak memory is traced in a separate run, so that tracing does not inflate the
+    timings.
+
+    Returns:
+        dict: Median and minimum wall time (seconds) and peak memory (MB).
+    """
+    times = []
+    for _ in range(repeat):
+        _cold_caches()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    _cold_caches()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    return {
+        "wall_time_s": statistics.median(times),
+        "min_wall_time_s": min(times),
+        "peak_memory_mb": peak,
+    }
+
+
+def check_scaling(
+    donor_counts: tuple[int, ...] = SCALING_DONORS,
+    year_counts: tuple[int, ...] = SCALING_YEARS,
+    repeat: int = 3,
+    engine: str = "numpy",
+) -> tuple[pd.DataFrame, float]:
+    """Time main_column_chart_with_projections (from cold caches) for every donor in
+    the fixtures, at each scale, and fit how the time grows with the number of
+    donor-years.
+
+    Returns:
+        tuple[pd.DataFrame, float]: Wall time per scale, and the exponent of the
+        fitted time ~ (donors x years) ** exponent curve (1 is linear).
+    """
+    rows = []
+    for years in year_counts:
+        start_year = horizon.LATEST_KNOWN_DATA_YEAR - years + 1
+        for donors in donor_counts:
+            fixtures = Fixtures(donors=donors, first_year=start_year - 5)
+            with use_fixtures(fixtures):
+                result = measure(
+                    lambda: main_column_chart_with_projections(
+                        start_year=start_year,
+                        donors=common.DAC_MEMBERS,
+                        total_name="DAC members",
+                        engine=engine,
+                    ),
+                    repeat=repeat,
+                )
+            rows.append({"donors": donors, "years": years, **result})
+            logger.info(
+                f"{donors} donors x {years} years: {result['wall_time_s']:.3f}s"
+            )
+
+    times = pd.DataFrame(rows).assign(
+        donor_years=lambda d: d.donors * d.years,
+        us_per_donor_year=lambda d: 1e6 * d.wall_time_s / d.donor_years,
+    )
+    exponent = np.polyfit(np.log(times.donor_years), np.log(times.wall_time_s), 1)[0]
+
+    return times, float(exponent)
+
+
+def _stages(fixtures: Fixtures, start_year: int, scenarios: int) -> dict:
+    years = range(start_year, fixtures.data_year + 1)
+    spending = fixtures.oda(
+        years=list(years),
+        donors=fixtures.donors,
+        indicators=["total_oda_official_definition", "gni"],
+        currency="EUR",
+    ).pivot(index=["year", "donor_code"], columns="indicator", values="value")
+    spending = spending.reset_index()
+
+    members = main_column_chart_with_projections(start_year=start_year)
+    inputs = fetch_projection_inputs(start_year=start_year)
+
+    return {
+        "to_constant": lambda: to_constant(spending, base_year=2025),
+        "main_column_chart_with_projections": lambda: (
+            main_column_chart_with_projections(start_year=start_year)
+        ),
+        "main_column_chart_with_projections[numpy]": lambda: (
+            main_column_chart_with_projections(start_year=start_year, engine="numpy")
+        ),
+        "eui_spending_chart": lambda: eui_spending_chart(members),
+        "prefetch[sequential]": lambda: prefetch(max_workers=1),
+        "prefetch[concurrent]": lambda: prefetch(),
+        "monte_carlo_mff_totals[10k]": lambda: monte_carlo_mff_totals(
+            draws=10_000, seed=0, volatility=0.02, start_year=start_year
+        ),
+        "chart_variants": lambda: chart_variants(start_year=start_year),
+        "scenario_service[uncached]": lambda: ScenarioService(
+            inputs=inputs, start_year=start_year
+        ).handle("/chart?target_year=2031&base_year=2025"),
+        "scenario_sweep": lambda: scenario_sweep(
+            {"target_year": list(range(2026, 2026 + scenarios))},
+            start_year=start_year,
+            max_workers=1,
+        ),
+    }
+
+
+def run_benchmarks(
+    donors: int = 27,
+    years: int = 10,
+    scenarios: int = 8,
+    repeat: int = 3,
+    stages: list[str] | None = None,
+    latency: float = 0.0,
+) -> dict:
+    """Run every benchmark stage against fixtures of the given scale.
+
+    Args:
+        donors (int): Number of donors in the fixtures.
+        years (int): Number of years of historical data.
+        scenarios (int): Number of scenarios in the sweep stage.
+        repeat (int): Number of runs per stage.
+        stages (list[str] | None): Stages to run. All stages if None.
+        latency (float): Seconds each fixture source load waits, to mimic network
+            I/O (see the prefetch stages).
+
+    Returns:
+        dict: Run metadata and the results for each stage.
+    """
+    start_year = horizon.LATEST_KNOWN_DATA_YEAR - years + 1
+    fixtures = Fixtures(donors=donors, first_year=start_year - 5, latency=latency)
+
+    results = {}
+    with use_fixtures(fixtures):
+        for name, func in _stages(fixtures, start_year, scenarios).items():
+            if stages is not None and name not in stages:
+                continue
+            results[name] = measure(func, repeat=repeat)
+            logger.info(
+                f"{name}: {results[name]['wall_time_s']:.3f}s, "
+                f"{results[name]['peak_memory_mb']:.1f}MB"
+            )
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "donors": donors,
+            "years": years,
+            "scenarios": scenarios,
+            "repeat": repeat,
+            "latency": latency,
+        },
+        "stages": results,
+    }
+
+
+def save_results(results: dict, path: Path | None = None) -> Path:
+    """Save benchmark results as JSON (by default, in the benchmarks folder)."""
+    if path is None:
+        stamp = results["meta"]["timestamp"].replace(":", "")
+        path = Paths.benchmarks / f"benchmark_{stamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2))
+    return path
+
+
+def compare_to_baseline(
+    results: dict, baseline: dict, tolerance: float = 0.2
+) -> pd.DataFrame:
+    """Compare benchmark results to a baseline run.
+
+    Args:
+        results (dict): Current results.
+        baseline (dict): Baseline results.
+        tolerance (float): Allowed relative increase before a stage is flagged.
+
+    Returns:
+        pd.DataFrame: Time and memory ratios per stage, with a regression flag.
+    """
+    rows = []
+    for stage, current in results["stages"].items():
+        if stage not in baseline["stages"]:
+            continue
+        base = baseline["stages"][stage]
+        time_ratio = current["wall_time_s"] / base["wall_time_s"]
+        memory_ratio = current["peak_memory_mb"] / base["peak_memory_mb"]
+        rows.append(
+            {
+                "stage": stage,
+                "wall_time_s": current["wall_time_s"],
+                "baseline_wall_time_s": base["wall_time_s"],
+                "time_ratio": time_ratio,
+                "peak_memory_mb": current["peak_memory_mb"],
+                "baseline_peak_memory_mb": base["peak_memory_mb"],
+                "memory_ratio": memory_ratio,
+                "regression": max(time_ratio, memory_ratio) > 1 + tolerance,
+            }
+        )
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--donors", type=int, default=27)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--scenarios", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--stage", action="append", dest="stages")
+    parser.add_argument("--check", action="store_true", help="Run the tests first")
+    parser.add_argument("--save", action="store_true")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--imports", action="store_true", help="Check import times")
+    parser.add_argument("--import-budget-ms", type=float, default=100.0)
+    parser.add_argument("--memory", action="store_true", help="Check peak memory")
+    parser.add_argument("--memory-budget-mb", type=float, default=MEMORY_BUDGET_MB)
+    parser.add_argument("--memory-donors", type=int, default=MEMORY_BUDGET_DONORS)
+    parser.add_argument("--scaling", action="store_true", help="Time donors x years")
+    parser.add_argument("--scaling-engine", default="numpy")
+    args = parser.parse_args()
+
+    # Keep per-stage debug logging out of the timings
+    configure_logging(logging.INFO)
+
+    if args.imports:
+        times = check_import_times(args.import_budget_ms)
+        print(times.to_string(index=False))
+        if times.over_budget.any():
+            raise SystemExit(1)
+
+    if args.memory:
+        memory = check_memory_budget(args.memory_donors, args.memory_budget_mb)
+        logger.info(
+            f"Peak memory at {memory['donors']} donors: "
+            f"{memory['peak_memory_mb']:.1f}MB (budget {memory['budget_mb']:.0f}MB)"
+        )
+        if memory["over_budget"]:
+            raise SystemExit(1)
+
+    if args.scaling:
+        times, exponent = check_scaling(repeat=args.repeat, engine=args.scaling_engine)
+        print(times.to_string(index=False))
+        logger.info(
+            f"Time grows as (donors x years) ** {exponent:.2f} "
+            f"(budget {SCALING_MAX_EXPONENT})"
+        )
+        raise SystemExit(int(exponent > SCALING_MAX_EXPONENT))
+
+    if args.check:
+        import pytest
+
+        if pytest.main(["-q", str(Paths.app_data / "tests")]) != 0:
+            raise SystemExit(1)
+
+    results = run_benchmarks(
+        donors=args.donors,
+        years=args.years,
+        scenarios=args.scenarios,
+        repeat=args.repeat,
+        stages=args.stages,
+        latency=args.latency,
+    )
+
+    if args.save or args.output:
+        logger.info(f"Saved results to {save_results(results, args.output)}")
+
+    if args.baseline:
+        comparison = compare_to_baseline(
+            results, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        print(comparison.to_string(index=False))
+        if comparison.regression.any():
+            raise SystemExit(1)
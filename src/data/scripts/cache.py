@@ -0,0 +1,241 @@
+import hashlib
+import inspect
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Iterable
+
+import pandas as pd
+
+from scripts import sources
+from scripts.config import Paths
+
+logger = logging.getLogger(__name__)
+
+
+class TableCache:
+    """LRU cache of DataFrames, kept in memory and mirrored to parquet files.
+
+    Entries are keyed on a source vintage plus the call parameters. When a table is
+    stored for a new vintage, files written for any other vintage of the same table
+    are removed from disk.
+    """
+
+    def __init__(self, folder: Path, maxsize: int = 32):
+        self.folder = folder
+        self.maxsize = maxsize
+        self._memory: OrderedDict[tuple, pd.DataFrame] = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: dict[tuple, threading.Lock] = {}
+
+    def key_lock(self, name: str, vintage: tuple, params: tuple) -> threading.Lock:
+        """Lock for one entry, so concurrent callers build each table only once."""
+        with self._lock:
+            return self._key_locks.setdefault((name, vintage, params), threading.Lock())
+
+    @staticmethod
+    def _digest(params: tuple) -> str:
+        return hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+
+    def _file(self, name: str, vintage: tuple, params: tuple) -> Path:
+        vintage_str = "_".join(str(v) for v in vintage)
+        return self.folder / f"{name}__{vintage_str}__{self._digest(params)}.parquet"
+
+    def get(self, name: str, vintage: tuple, params: tuple) -> pd.DataFrame | None:
+        key = (name, vintage, params)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        file = self._file(name, vintage, params)
+        if file.exists():
+            logger.debug(f"Loaded {name} from cache file {file.name}")
+            df = pd.read_parquet(file)
+            self._remember(key, df)
+            return df
+
+        return None
+
+    def put(self, name: str, vintage: tuple, params: tuple, df: pd.DataFrame) -> None:
+        self._remember((name, vintage, params), df)
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+        file = self._file(name, vintage, params)
+        prefix = file.name.split("__")[1]
+        for stale in self.folder.glob(f"{name}__*.parquet"):
+            if stale.name.split("__")[1] != prefix:
+                logger.debug(f"Removing outdated cache file {stale.name}")
+                stale.unlink()
+
+        df.to_parquet(file)
+
+    def _remember(self, key: tuple, df: pd.DataFrame) -> None:
+        with self._lock:
+            self._memory[key] = df
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def clear(self, disk: bool = False) -> None:
+        """Empty the in-memory cache and, optionally, delete the parquet files."""
+        with self._lock:
+            self._memory.clear()
+        if disk:
+            for file in self.folder.glob("*.parquet"):
+                file.unlink()
+
+
+weo_cache = TableCache(Paths.raw_data / "weo_cache")
+
+
+def _normalise(value):
+    if isinstance(value, (list, tuple, set, range)):
+        return tuple(sorted(value))
+    return value
+
+
+def cached_table(name: str, vintage: tuple, cache: TableCache = weo_cache):
+    """Decorator to cache a function that returns a DataFrame. The key is made up of
+    the table name, the source vintage, a hash of the function's source and the
+    (normalised) function arguments, so tables cached by an older version of the
+    function are not served (and their files are removed when the table is stored)."""
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        source = hashlib.sha1(inspect.getsource(func).encode()).hexdigest()[:8]
+        key_vintage = (*vintage, source)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> pd.DataFrame:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = tuple((k, _normalise(v)) for k, v in bound.arguments.items())
+
+            with cache.key_lock(name, key_vintage, params):
+                df = cache.get(name, key_vintage, params)
+                if df is None:
+                    df = func(*args, **kwargs)
+                    cache.put(name, key_vintage, params, df)
+
+            return df.copy()
+
+        return wrapper
+
+    return decorator
+
+
+class ODAQueryCache:
+    """Read-through cache in front of ODAData.
+
+    A query is served from memory when its years, donors and indicators are a
+    subset of a query already loaded in the same currency. Concurrent identical
+    queries share a single load.
+    """
+
+    def __init__(self, loader: Callable[..., pd.DataFrame] | None = None):
+        # Defaults to sources.oda_data, looked up when a query is loaded
+        self.loader = loader
+        self._entries: list[tuple[tuple, pd.DataFrame]] = []
+        self._inflight: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _key(
+        years: int | Iterable[int],
+        donors: Iterable[int],
+        indicators: str | Iterable[str],
+        currency: str,
+    ) -> tuple:
+        if isinstance(years, int):
+            years = [years]
+        if isinstance(indicators, str):
+            indicators = [indicators]
+        return frozenset(years), frozenset(donors), frozenset(indicators), currency
+
+    def _find(self, key: tuple) -> pd.DataFrame | None:
+        years, donors, indicators, currency = key
+        for (c_years, c_donors, c_indicators, c_currency), df in self._entries:
+            if (
+                currency == c_currency
+                and years <= c_years
+                and donors <= c_donors
+                and indicators <= c_indicators
+            ):
+                return df
+        return None
+
+    def query(
+        self,
+        years: int | Iterable[int],
+        donors: Iterable[int],
+        indicators: str | Iterable[str],
+        currency: str = "USD",
+    ) -> pd.DataFrame:
+        """Get ODAData data (long format) for the given years, donors, indicators
+        and currency."""
+        key = self._key(years, donors, indicators, currency)
+        years, donors, indicators, currency = key
+
+        with self._lock:
+            cached = self._find(key)
+            if cached is not None:
+                self.hits += 1
+                future, owner = None, False
+            elif key in self._inflight:
+                self.coalesced += 1
+                future, owner = self._inflight[key], False
+            else:
+                self.misses += 1
+                future, owner = Future(), True
+                self._inflight[key] = future
+
+        if cached is not None:
+            return cached.loc[
+                lambda d: d.year.isin(years)
+                & d.donor_code.isin(donors)
+                & d.indicator.isin(indicators)
+            ].reset_index(drop=True)
+
+        if not owner:
+            return future.result().copy()
+
+        try:
+            loader = sources.oda_data if self.loader is None else self.loader
+            df = loader(
+                years=sorted(years),
+                donors=sorted(donors),
+                indicators=sorted(indicators),
+                currency=currency,
+            )
+        except Exception as error:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(error)
+            raise
+
+        with self._lock:
+            self._entries.append((key, df))
+            del self._inflight[key]
+        future.set_result(df)
+
+        return df.copy()
+
+    def stats(self) -> dict:
+        """Hit, miss and coalesced-request counters."""
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.coalesced = 0
+
+
+oda_cache = ODAQueryCache()
@@ -0,0 +1,88 @@
+"""Checkpoints for resumable runs.
+
+Named intermediate results are written as feather files, in a folder keyed on the
+run parameters (plus the data horizon and source vintages). If a run fails part of
+the way through, rerunning it with the same parameters loads the intermediates that
+were already computed instead of fetching and converting them again. Entry points
+clear their checkpoints once the run completes.
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from scripts.common import WEO_DEFLATORS_VINTAGE, WEO_GROWTH_VINTAGE
+from scripts.config import Paths
+from scripts.horizon import max_data_year
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoints:
+    """Feather checkpoints for one run.
+
+    Args:
+        run (str): Name of the run (e.g. "ms_analysis").
+        params (dict): Parameters of the run. Runs with other parameters, another
+            data horizon or other WEO vintages do not share checkpoints.
+        folder (Path | None): Root folder. Defaults to Paths.checkpoints.
+    """
+
+    def __init__(self, run: str, params: dict, folder: Path | None = None):
+        key = {
+            "params": params,
+            "max_data_year": max_data_year(),
+            "vintages": [WEO_DEFLATORS_VINTAGE, WEO_GROWTH_VINTAGE],
+        }
+        digest = hashlib.sha1(
+            json.dumps(key, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+
+        root = Paths.checkpoints if folder is None else folder
+        self.folder = root / run / digest
+
+    def path(self, name: str) -> Path:
+        return self.folder / f"{name}.feather"
+
+    def stored(self, *names: str) -> bool:
+        """Whether every one of the named checkpoints has been stored."""
+        return all(self.path(name).exists() for name in names)
+
+    def load_or_run(self, name: str, func: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Load a checkpoint or, if there is none yet, compute and store it.
+
+        The returned DataFrame has a default index whether it was loaded or
+        computed, since feather does not store the index.
+        """
+        path = self.path(name)
+        if path.exists():
+            logger.info(f"Resuming from checkpoint {name}")
+            return pd.read_feather(path)
+
+        df = func().reset_index(drop=True)
+
+        # Written under a temporary name, so a failed write is not picked up later
+        self.folder.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".partial")
+        df.to_feather(partial)
+        partial.replace(path)
+
+        return df
+
+    def clear(self) -> None:
+        """Delete the checkpoints of this run."""
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+def checkpoint(
+    checkpoints: Checkpoints | None, name: str, func: Callable[[], pd.DataFrame]
+) -> pd.DataFrame:
+    """Run func through the checkpoints if any, or directly otherwise."""
+    if checkpoints is None:
+        return func()
+    return checkpoints.load_or_run(name, func)
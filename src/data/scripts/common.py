@@ -1,8 +1,6 @@
-from oda_data import donor_groupings
+from scripts import sources
 
 CURRENCY = "EUR"
-EU27 = list(donor_groupings()["eu27_countries"].keys())
-EU28 = EU27 + [12]
 LOWER_TARGET = 0.0033
 TARGET = 0.007
 LOWER_TARGET_COUNTRIES = {
@@ -20,3 +18,19 @@ LOWER_TARGET_COUNTRIES = {
     83,
     76,
 }
+
+# IMF World Economic Outlook vintages (year, release) used for the analysis
+WEO_DEFLATORS_VINTAGE = (2024, 2)
+WEO_GROWTH_VINTAGE = (2024, 1)
+
+
+def __getattr__(name: str) -> list[int]:
+    # EU27, EU28 and DAC_MEMBERS come from the oda_data donor groupings, which are
+    # only loaded the first time one of the lists is used.
+    if name == "DAC_MEMBERS":
+        return list(sources.donor_groupings()["dac_members"].keys())
+    if name == "EU27":
+        return list(sources.donor_groupings()["eu27_countries"].keys())
+    if name == "EU28":
+        return __getattr__("EU27") + [12]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -9,3 +9,9 @@ class Paths:
     app = project
     app_data = app / "src" / "data"
     scripts = app_data / "scripts"
+    benchmarks = project / "benchmarks"
+    traces = project / "traces"
+    pipeline = raw_data / "pipeline"
+    history = raw_data / "history"
+    checkpoints = raw_data / "checkpoints"
+    pipeline_state = project / ".pipeline_state.json"
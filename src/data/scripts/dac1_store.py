@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.config import Paths
+
+logger = logging.getLogger(__name__)
+
+RAW_DAC1 = Paths.raw_data / "table1_raw_2014_2023.parquet"
+DAC1_STORE = Paths.raw_data / "dac1_store"
+
+# Hash of the raw table the store was built from. The dataset reader skips files
+# whose name starts with an underscore.
+SOURCE_MARKER = "_source.json"
+
+# Maps the DAC1 (SDMX) filters used with oda_reader.download_dac1 to the
+# .Stat codes used in the local table.
+SDMX_TO_DOTSTAT = {
+    "flow_type": "flows_code",
+    "measure": "aidtype_code",
+    "price_base": "amounttype_code",
+}
+PRICE_BASE_TO_AMOUNT_TYPE = {"V": "A", "Q": "D"}
+
+
+# SHA-256 of each raw table, with the modification time and size it was computed at
+_DIGESTS: dict[Path, tuple[int, int, str]] = {}
+
+
+class MissingYears(ValueError):
+    """The local DAC1 store has no data for some of the requested years."""
+
+
+def build_dac1_store(
+    source: Path = RAW_DAC1, store: Path = DAC1_STORE, row_group_size: int = 8_192
+) -> None:
+    """Rewrite the raw DAC1 table as a parquet dataset partitioned by year and
+    sorted by donor, so that year and donor filters only touch the row groups they
+    need. Any previous store is replaced, and the hash of the raw table is recorded
+    next to the data.
+
+    Args:
+        source (Path): Raw DAC1 parquet file.
+        store (Path): Folder where the partitioned dataset is written.
+        row_group_size (int): Maximum number of rows per row group.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(source).sort_by(
+        [
+            ("year", "ascending"),
+            ("donor_code", "ascending"),
+            ("aidtype_code", "ascending"),
+        ]
+    )
+
+    if store.exists():
+        shutil.rmtree(store)
+
+    ds.write_dataset(
+        table,
+        base_dir=store,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("year", pa.int32())]), flavor="hive"),
+        max_rows_per_group=row_group_size,
+        min_rows_per_group=min(row_group_size, 1_024),
+        existing_data_behavior="delete_matching",
+    )
+
+    (store / SOURCE_MARKER).write_text(
+        json.dumps({"source": source.name, "sha256": _digest(source)})
+    )
+
+    logger.info(f"Built DAC1 store with {table.num_rows} rows in {store}")
+
+
+def _digest(path: Path) -> str:
+    """SHA-256 of a file, only recomputed when its modification time or size
+    changes."""
+    stat = path.stat()
+    cached = _DIGESTS.get(path)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        cached = _DIGESTS[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return cached[2]
+
+
+def _dataset(store: Path = DAC1_STORE, source: Path = RAW_DAC1):
+    """The store as an Arrow dataset, (re)built first if it is missing or was built
+    from a different version of the raw table."""
+    import pyarrow.dataset as ds
+
+    marker = store / SOURCE_MARKER
+    built_from = json.loads(marker.read_text())["sha256"] if marker.exists() else None
+    if built_from != _digest(source):
+        if store.exists():
+            logger.info(f"{source.name} changed, rebuilding the DAC1 store")
+        build_dac1_store(source=source, store=store)
+
+    return ds.dataset(store, format="parquet", partitioning="hive")
+
+
+def read_dac1(
+    start_year: int,
+    end_year: int,
+    donors: list[int] | None = None,
+    flows_code: int | None = None,
+    aidtype_code: int | None = None,
+    amounttype_code: str | None = None,
+    columns: list[str] | None = None,
+    store: Path = DAC1_STORE,
+    source: Path = RAW_DAC1,
+) -> pd.DataFrame:
+    """Read DAC1 data from the local store. Filters are pushed down to the Arrow
+    reader, so only the matching partitions, row groups and columns are read.
+
+    Args:
+        start_year (int): First year to read.
+        end_year (int): Last year to read.
+        donors (list[int] | None): DAC donor codes to keep. All donors if None.
+        flows_code (int | None): Flow type (e.g. 1120 for gross disbursements).
+        aidtype_code (int | None): Aid type (e.g. 2102 for EU institutions).
+        amounttype_code (str | None): Amount type (e.g. "A" for current prices).
+        columns (list[str] | None): Columns to read. All columns if None.
+        store (Path): Store folder.
+        source (Path): Raw DAC1 parquet file the store is built from.
+
+    Returns:
+        pd.DataFrame: The filtered DAC1 data.
+
+    Raises:
+        MissingYears: If no rows match the filters in some of the years (e.g. a year
+            the raw table has, but without the requested aid type yet).
+    """
+    import pyarrow.dataset as ds
+
+    dataset = _dataset(store, source)
+
+    expression = (ds.field("year") >= start_year) & (ds.field("year") <= end_year)
+
+    if donors is not None:
+        expression &= ds.field("donor_code").isin(list(donors))
+    if flows_code is not None:
+        expression &= ds.field("flows_code") == int(flows_code)
+    if aidtype_code is not None:
+        expression &= ds.field("aidtype_code") == int(aidtype_code)
+    if amounttype_code is not None:
+        expression &= ds.field("amounttype_code") == amounttype_code
+
+    df = (
+        dataset.to_table(columns=columns, filter=expression)
+        .to_pandas()
+        .astype({"year": "int32"})
+        .sort_values(["year", "donor_code"])
+        .reset_index(drop=True)
+    )
+
+    missing = sorted(set(range(start_year, end_year + 1)) - set(df.year))
+    if missing:
+        raise MissingYears(f"The local DAC1 store has no matching data for {missing}")
+
+    return df
+
+
+def read_dac1_sdmx_filters(
+    start_year: int,
+    end_year: int,
+    filters: dict,
+    donors: list[int] | None = None,
+    columns: list[str] | None = None,
+    store: Path = DAC1_STORE,
+) -> pd.DataFrame:
+    """Read DAC1 data from the local store using the same filters that
+    oda_reader.download_dac1 takes.
+
+    Only US dollar data is stored, so the unit_measure filter must be "USD".
+    """
+    if filters.get("unit_measure", "USD") != "USD":
+        raise ValueError("The local DAC1 store only holds USD values")
+
+    unknown = set(filters) - set(SDMX_TO_DOTSTAT) - {"unit_measure"}
+    if unknown:
+        raise ValueError(f"Unsupported DAC1 filters: {unknown}")
+
+    return read_dac1(
+        start_year=start_year,
+        end_year=end_year,
+        donors=donors,
+        flows_code=filters.get("flow_type"),
+        aidtype_code=filters.get("measure"),
+        amounttype_code=(
+            PRICE_BASE_TO_AMOUNT_TYPE[filters["price_base"]]
+            if "price_base" in filters
+            else None
+        ),
+        columns=columns,
+        store=store,
+    )
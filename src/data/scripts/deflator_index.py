@@ -0,0 +1,131 @@
+"""Indexed access to the pydeflate DAC1 deflator and exchange rate table.
+
+The table (raw_data/pydeflate_dac1.feather) is compressed, which Arrow cannot map
+without decompressing it into private memory. An uncompressed copy is written next
+to it once (and rewritten when the table changes), and that copy is memory-mapped
+through Arrow, so its value columns are read as zero-copy views of the file and
+processes that open it share its pages. A (id, year) to row offset index is built
+once, and values for arrays of ids and years are gathered through it instead of
+merged.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class KeyIndex:
+    """Row offsets of unique (id, year) keys, stored as a dense (id x year) array.
+
+    Args:
+        ids (Iterable): Id of each row. Rows with a missing id are not indexed.
+        years (Iterable[int]): Year of each row.
+    """
+
+    def __init__(self, ids: Iterable, years: Iterable[int]):
+        codes, self.ids = pd.factorize(np.asarray(ids))
+        years = np.asarray(years, dtype="int64")
+
+        # factorize codes missing ids as -1, which would index the last id
+        rows = np.flatnonzero(codes >= 0)
+        codes, years = codes[rows], years[rows]
+
+        self.first_year = int(years.min()) if len(years) else 0
+        span = int(years.max()) - self.first_year + 1 if len(years) else 0
+
+        self.offsets = np.full((len(self.ids), span), -1, dtype="int64")
+        self.offsets[codes, years - self.first_year] = rows
+
+    def get(self, ids: Iterable, years: Iterable[int]) -> np.ndarray:
+        """Row offset of each (id, year) pair, or -1 if the pair is not indexed."""
+        codes = pd.Index(self.ids).get_indexer(np.asarray(ids))
+        col = np.asarray(years, dtype="int64") - self.first_year
+
+        found = (codes >= 0) & (col >= 0) & (col < self.offsets.shape[1])
+        offsets = np.full(len(codes), -1, dtype="int64")
+        offsets[found] = self.offsets[codes[found], col[found]]
+
+        return offsets
+
+    def take(self, values: np.ndarray, ids: Iterable, years: Iterable[int]):
+        """Gather values (one per indexed row) for each (id, year) pair. Pairs that
+        are not indexed get NaN."""
+        offsets = self.get(ids, years)
+        return np.where(offsets >= 0, values[offsets], np.nan)
+
+
+# Schema metadata key of the uncompressed copy, holding the hash of its source
+SOURCE_DIGEST = b"source_sha256"
+
+
+def uncompressed_copy(path: Path) -> Path:
+    """An uncompressed copy of a feather file, next to it. It is written the first
+    time and rewritten when the hash of the file no longer matches the one stored in
+    the copy's metadata.
+
+    Args:
+        path (Path): Path to the (possibly compressed) feather file.
+
+    Returns:
+        Path: Path to the uncompressed copy.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    copy = path.with_suffix(".uncompressed.feather")
+    digest = hashlib.sha256(path.read_bytes()).hexdigest().encode()
+
+    if copy.exists():
+        with pa.memory_map(str(copy)) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+        if metadata.get(SOURCE_DIGEST) == digest:
+            return copy
+
+    table = feather.read_table(path)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), SOURCE_DIGEST: digest}
+    )
+    feather.write_feather(table, copy, compression="uncompressed")
+
+    return copy
+
+
+class DeflatorIndex:
+    """Memory-mapped pydeflate DAC1 table, indexed on (iso_code, year).
+
+    Args:
+        path (Path): Path to the feather file. An uncompressed copy of it is the
+            file that is mapped (see uncompressed_copy).
+    """
+
+    def __init__(self, path: Path):
+        import pyarrow as pa
+
+        self.path = path
+        self.mapped_path = uncompressed_copy(path)
+        table = pa.ipc.open_file(pa.memory_map(str(self.mapped_path))).read_all()
+
+        years = pd.DatetimeIndex(table["year"].to_pandas()).year
+        self.index = KeyIndex(table["iso_code"].to_numpy(), years)
+
+        self.columns = {
+            name: self._values(table[name]) for name in ("exchange", "deflator")
+        }
+
+    @staticmethod
+    def _values(column) -> np.ndarray:
+        # Single chunk without nulls: a read-only view of the mapped (uncompressed)
+        # file
+        if column.num_chunks == 1 and column.null_count == 0:
+            return column.chunk(0).to_numpy(zero_copy_only=True)
+        return column.to_numpy().astype("float64")
+
+    def lookup(
+        self, iso_codes: Iterable[str], years: Iterable[int], column: str = "deflator"
+    ) -> np.ndarray:
+        """Values of a column ("exchange" or "deflator") for each (iso_code, year)
+        pair, or NaN where the table has no data."""
+        return self.index.take(self.columns[column], iso_codes, years)
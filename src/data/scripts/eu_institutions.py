@@ -1,29 +1,32 @@
+import logging
+from typing import Iterable
+
+import numpy as np
 import pandas as pd
-from oda_data import ODAData, set_data_path
-from oda_reader import download_dac1
 
-from scripts import config
+from scripts import common, config, sources
+from scripts.cache import oda_cache
+from scripts.checkpoints import Checkpoints, checkpoint
+from scripts.dac1_store import MissingYears, read_dac1_sdmx_filters
+from scripts.horizon import max_data_year
+from scripts.instrumentation import instrument, trace_run
 from scripts.tools import to_constant
 
-set_data_path(config.Paths.raw_data)
-
-from scripts.common import EU27, EU28
+logger = logging.getLogger(__name__)
 
 
+@instrument
 def get_eui_total_oda(
     start_year: int = 2022, end_year: int = 2023, currency: str = "USD"
 ) -> pd.DataFrame:
 
-    oda = ODAData(
-        years=range(start_year, end_year + 1),
-        donors=[20918, 918],
-        currency=currency,
-    )
-
-    oda.load_indicator(["total_oda_official_definition"])
-
     df = (
-        oda.get_data()
+        oda_cache.query(
+            years=range(start_year, end_year + 1),
+            donors=[20918, 918],
+            indicators=["total_oda_official_definition"],
+            currency=currency,
+        )
         .pivot(index=["year", "donor_code"], columns="indicator", values="value")
         .reset_index()
     )
@@ -31,9 +34,22 @@ def get_eui_total_oda(
     return df
 
 
+@instrument
 def download_eu_x_eui(
-    x: list = EU27, start_year: int = 2022, end_year: int = 2023
+    x: list | None = None,
+    start_year: int = 2022,
+    end_year: int = 2023,
+    source: str = "local",
 ) -> pd.DataFrame:
+    """Get the contributions of the donors in x to the EU Institutions.
+
+    With source="local" (default) the data is read from the local DAC1 store,
+    with the donor and year filters pushed down to the reader. If some of the years
+    have no contributions in the store (e.g. after a new release), the years are
+    downloaded instead. With
+    source="remote" it is downloaded with oda_reader. x defaults to the EU27."""
+    if x is None:
+        x = common.EU27
 
     filters = {
         "flow_type": "1120",
@@ -41,13 +57,29 @@ def download_eu_x_eui(
         "price_base": "V",
         "unit_measure": "USD",
     }
-    df = download_dac1(start_year=start_year, end_year=end_year, filters=filters)
+
+    if source == "local":
+        try:
+            return read_dac1_sdmx_filters(
+                start_year=start_year, end_year=end_year, filters=filters, donors=x
+            )
+        except MissingYears as error:
+            logger.warning(f"{error}, downloading {start_year}-{end_year} instead")
+            source = "remote"
+
+    if source != "remote":
+        raise ValueError(f"Unknown source: {source}")
+
+    df = sources.download_dac1(
+        start_year=start_year, end_year=end_year, filters=filters
+    )
 
     df = df.loc[lambda d: d.donor_code.isin(x)]
 
     return df
 
 
+@instrument
 def contributions_to_constant(df: pd.DataFrame, eu_list: list) -> pd.DataFrame:
     return to_constant(
         df=df,
@@ -59,26 +91,39 @@ def contributions_to_constant(df: pd.DataFrame, eu_list: list) -> pd.DataFrame:
     )
 
 
-def eu_own_resources_constant_eur() -> pd.DataFrame:
+@instrument
+def _spending_eui(end_year: int) -> pd.DataFrame:
     spending_eui = get_eui_total_oda(
-        start_year=2014, end_year=2023, currency="USD"
+        start_year=2014, end_year=end_year, currency="USD"
     ).assign(dac_code=lambda d: d.donor_code)
 
-    spending_eui = to_constant(df=spending_eui, base_year=2025, source_currency="USD")
+    return to_constant(df=spending_eui, base_year=2025, source_currency="USD")
 
-    eu28_contributions_to_eui = (
-        download_eu_x_eui(EU28, start_year=2014, end_year=2020)
-        .rename(columns={"value": "value_eu"})
-        .pipe(contributions_to_constant, eu_list=EU28)
-    )
 
-    eu27_contributions_to_eui = (
-        download_eu_x_eui(EU27, start_year=2021, end_year=2023)
-        .rename(columns={"value": "value_eu"})
-        .pipe(contributions_to_constant, eu_list=EU27)
-    )
+@instrument
+def _contributions_to_eui(
+    end_year: int,
+    eu28_contributions: pd.DataFrame | None,
+    eu27_contributions: pd.DataFrame | None,
+) -> pd.DataFrame:
+    if eu28_contributions is None:
+        eu28_contributions = download_eu_x_eui(
+            common.EU28, start_year=2014, end_year=2020
+        )
+    if eu27_contributions is None:
+        eu27_contributions = download_eu_x_eui(
+            common.EU27, start_year=2021, end_year=end_year
+        )
+
+    eu28_contributions_to_eui = eu28_contributions.rename(
+        columns={"value": "value_eu"}
+    ).pipe(contributions_to_constant, eu_list=common.EU28)
 
-    contributions_to_eui = (
+    eu27_contributions_to_eui = eu27_contributions.rename(
+        columns={"value": "value_eu"}
+    ).pipe(contributions_to_constant, eu_list=common.EU27)
+
+    return (
         pd.concat(
             [eu28_contributions_to_eui, eu27_contributions_to_eui], ignore_index=True
         )
@@ -87,6 +132,49 @@ def eu_own_resources_constant_eur() -> pd.DataFrame:
         .reset_index()
     )
 
+
+# Checkpoints of eu_own_resources_constant_eur
+OWN_RESOURCES_CHECKPOINTS = ("spending_eui", "contributions_to_eui")
+
+
+def own_resources_checkpoints(run: str) -> Checkpoints:
+    """Checkpoints for eu_own_resources_constant_eur, keyed on the years of the
+    EUI spending and of the EU28 and EU27 contributions, and their base year."""
+    end_year = max_data_year()
+    params = {
+        "spending_years": [2014, end_year],
+        "eu28_contribution_years": [2014, 2020],
+        "eu27_contribution_years": [2021, end_year],
+        "base_year": 2025,
+    }
+    return Checkpoints(run, params)
+
+
+@instrument
+def eu_own_resources_constant_eur(
+    eu28_contributions: pd.DataFrame | None = None,
+    eu27_contributions: pd.DataFrame | None = None,
+    checkpoints: Checkpoints | None = None,
+) -> pd.DataFrame:
+    """EU Institutions ODA in constant EUR, split between the part imputed to
+    Member States and the EU's own resources. The EU28 (2014-2020) and EU27
+    (2021 onwards) contributions are downloaded if not provided (e.g. by
+    prefetch).
+
+    With checkpoints (see own_resources_checkpoints), the converted spending_eui
+    and contributions_to_eui are stored, and loaded instead of recomputed when the
+    run is resumed."""
+    end_year = max_data_year()
+
+    spending_eui = checkpoint(
+        checkpoints, "spending_eui", lambda: _spending_eui(end_year)
+    )
+    contributions_to_eui = checkpoint(
+        checkpoints,
+        "contributions_to_eui",
+        lambda: _contributions_to_eui(end_year, eu28_contributions, eu27_contributions),
+    )
+
     data = pd.merge(spending_eui, contributions_to_eui, on="year", how="left")
 
     data["own_resources"] = data["total_oda_official_definition"] - data["value_eu"]
@@ -98,11 +186,17 @@ def eu_own_resources_constant_eur() -> pd.DataFrame:
     return data
 
 
-def eui_spending_chart(members: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def eui_spending_chart(
+    members: pd.DataFrame, own_resources: pd.DataFrame | None = None
+) -> pd.DataFrame:
 
     members = members.query("`Member State` == 'EU27 Countries'")
 
-    data = eu_own_resources_constant_eur().filter(
+    if own_resources is None:
+        own_resources = eu_own_resources_constant_eur()
+
+    data = own_resources.filter(
         [
             "year",
             "total_oda_official_definition",
@@ -152,6 +246,132 @@ def eui_key_numbers(data: pd.DataFrame, period_start: int, period_end: int) -> d
     return numbers
 
 
+def _all_windows(years: Iterable[int]) -> list[tuple[int, int]]:
+    years = sorted(set(years))
+    return [(start, end) for start in years for end in years if start <= end]
+
+
+def _window_sums(
+    values: pd.DataFrame, year_column: str, windows: list[tuple[int, int]]
+) -> np.ndarray:
+    """Sum of each value column over every (start, end) window of years, from
+    cumulative sums over the years. Returns a (window x column) array."""
+    by_year = values.groupby(year_column).sum()
+    years = np.arange(by_year.index.min(), by_year.index.max() + 1)
+    by_year = by_year.reindex(years, fill_value=0).fillna(0)
+
+    cumulative = np.vstack(
+        [np.zeros((1, by_year.shape[1])), np.cumsum(by_year.to_numpy(), axis=0)]
+    )
+    bounds = np.asarray(windows, dtype="int64").reshape(-1, 2)
+    start = np.clip(bounds[:, 0], years[0], years[-1] + 1) - years[0]
+    end = np.clip(bounds[:, 1], years[0] - 1, years[-1]) - years[0] + 1
+
+    return np.where(
+        (end > start)[:, None], cumulative[end] - cumulative[np.minimum(start, end)], 0
+    )
+
+
+@instrument
+def eui_key_numbers_windows(
+    data: pd.DataFrame, windows: Iterable[tuple[int, int]] | None = None
+) -> pd.DataFrame:
+    """Batched eui_key_numbers: the key numbers for many (period_start, period_end)
+    windows at once, from cumulative sums over the years.
+
+    Args:
+        data (pd.DataFrame): EUI spending chart data (see eui_spending_chart).
+        windows (Iterable[tuple[int, int]] | None): (period_start, period_end)
+            windows. Every window within the data years if None.
+
+    Returns:
+        pd.DataFrame: One row per window, with the eui_key_numbers columns.
+    """
+    windows = _all_windows(data.year) if windows is None else list(windows)
+
+    sums = _window_sums(
+        data.filter(
+            [
+                "year",
+                "Member States",
+                "Imputable EU Institutions ODA",
+                "Non-imputable EU Institutions ODA",
+            ]
+        ),
+        "year",
+        windows,
+    ).round(1)
+    ms_only, imputable, non_imputable = sums.T
+
+    ms_total = (ms_only + imputable).round(1)
+    eui_total = (imputable + non_imputable).round(1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        non_imputable_share = (100 * non_imputable / eui_total).round(4)
+        imputable_share = (100 * imputable / ms_total).round(4)
+
+    return pd.DataFrame(
+        {
+            "period_start": [w[0] for w in windows],
+            "period_end": [w[1] for w in windows],
+            "MS only": ms_only,
+            "Imputable EU Institutions": imputable,
+            "Non-imputable EU Institutions": non_imputable,
+            "MS total": ms_total,
+            "EUI total": eui_total,
+            "Non-imputable share of EUI": non_imputable_share,
+            "Imputable share of MS total": imputable_share,
+        }
+    )
+
+
+@instrument
+def eui_mff_periods(
+    ms_data: pd.DataFrame,
+    eui_data: pd.DataFrame,
+    periods: Iterable[tuple[int, int]],
+    references: Iterable[tuple[int, int]] = ((2014, 2022),),
+) -> pd.DataFrame:
+    """Imputable and non-imputable EUI ODA for many MFF periods and reference
+    windows in a single call. The EU27 ODA over each period is scaled by the EUI
+    shares observed over each reference window.
+
+    Args:
+        ms_data (pd.DataFrame): Member States chart data.
+        eui_data (pd.DataFrame): EUI spending chart data.
+        periods (Iterable[tuple[int, int]]): (start_year, end_year) MFF periods.
+        references (Iterable[tuple[int, int]]): Reference windows for the shares.
+
+    Returns:
+        pd.DataFrame: One row per period and reference window.
+    """
+    periods, references = list(periods), list(references)
+
+    eu27 = ms_data.loc[lambda d: d["Member State"] == "EU27 Countries"]
+    ms_mff = _window_sums(eu27.filter(["Year", "ODA"]), "Year", periods)[:, 0]
+
+    shares = eui_key_numbers_windows(eui_data, references)
+    imputable_share = shares["Imputable share of MS total"].to_numpy() / 100
+    non_imputable_share = shares["Non-imputable share of EUI"].to_numpy() / 100
+
+    eui_imputable = ms_mff[:, None] * imputable_share[None, :]
+    eui_non_imputable = (
+        eui_imputable / (1 - non_imputable_share[None, :]) - eui_imputable
+    )
+
+    return pd.DataFrame(
+        {
+            "start_year": np.repeat([p[0] for p in periods], len(references)),
+            "end_year": np.repeat([p[1] for p in periods], len(references)),
+            "reference_start": np.tile([r[0] for r in references], len(periods)),
+            "reference_end": np.tile([r[1] for r in references], len(periods)),
+            "MS ODA": np.repeat(ms_mff, len(references)),
+            "Imputable EU Institutions ODA": eui_imputable.ravel(),
+            "Non-imputable EU Institutions ODA": eui_non_imputable.ravel(),
+        }
+    )
+
+
 def eui_mff_period(
     ms_data: pd.DataFrame,
     eui_data: pd.DataFrame,
@@ -173,13 +393,33 @@ def eui_mff_period(
 
 
 if __name__ == "__main__":
-    # Read MS chart data
-    ms = pd.read_parquet(config.Paths.app_data / "eu27_chart.parquet")
-    # Calculate EUI spending chart
-    eui = eui_spending_chart(ms)
-    # Save for Flourish
-    eui.to_csv(config.Paths.app_data / "eui_spending_chart.csv", index=False)
-
-    # Calculate key numbers.
-    imputable, non_imputable = eui_mff_period(ms, eui)
-    total_eui = imputable + non_imputable
+    from scripts.logger import configure_logging
+    from scripts.outputs import write_outputs
+    from scripts.prefetch import prefetch
+
+    configure_logging()
+
+    with trace_run("eu_institutions"):
+        # A failed run resumes from the intermediates already computed
+        checkpoints = own_resources_checkpoints("eu_institutions")
+        # Load the source data concurrently, unless it was already converted
+        if checkpoints.stored(*OWN_RESOURCES_CHECKPOINTS):
+            inputs = {}
+        else:
+            inputs = prefetch(member_states=False)
+        # Read MS chart data
+        ms = pd.read_parquet(config.Paths.pipeline / "eu27_chart.parquet")
+        # Calculate EUI spending chart
+        own_resources = eu_own_resources_constant_eur(
+            eu28_contributions=inputs.get("eu28_contributions"),
+            eu27_contributions=inputs.get("eu27_contributions"),
+            checkpoints=checkpoints,
+        )
+        eui = eui_spending_chart(ms, own_resources=own_resources)
+        # Save for Flourish
+        write_outputs(eui, "eui_spending_chart", formats=("csv",))
+        checkpoints.clear()
+
+        # Calculate key numbers.
+        imputable, non_imputable = eui_mff_period(ms, eui)
+        total_eui = imputable + non_imputable
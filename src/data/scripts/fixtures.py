@@ -0,0 +1,312 @@
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scripts import cache, eu_institutions, horizon, sources
+from scripts.deflator_index import DeflatorIndex
+
+# DAC codes of the EU27 members, so the fixtures do not depend on oda_data
+EU27_CODES = [1, 2, 3, 4, 5, 6, 7, 9, 10, 18, 21, 22, 40, 50]
+EU27_CODES += [30, 45, 61, 62, 68, 69, 72, 75, 76, 77, 82, 83, 84]
+
+# DAC codes of the EU27 members by name, as in src/data/targets.json
+EU27_NAMES = {
+    "Austria": 1,
+    "Belgium": 2,
+    "Denmark": 3,
+    "France": 4,
+    "Germany": 5,
+    "Italy": 6,
+    "Netherlands": 7,
+    "Portugal": 9,
+    "Sweden": 10,
+    "Finland": 18,
+    "Ireland": 21,
+    "Luxembourg": 22,
+    "Greece": 40,
+    "Spain": 50,
+    "Cyprus": 30,
+    "Malta": 45,
+    "Slovenia": 61,
+    "Croatia": 62,
+    "Czech Republic": 68,
+    "Slovak Republic": 69,
+    "Bulgaria": 72,
+    "Hungary": 75,
+    "Poland": 76,
+    "Romania": 77,
+    "Estonia": 82,
+    "Latvia": 83,
+    "Lithuania": 84,
+}
+
+
+def _donor_iso(code: int) -> str:
+    return "EUI" if code == 918 else f"D{code:05d}"
+
+
+class Fixtures:
+    """Deterministic, local stand-ins for the ODAData, WorldEconomicOutlook,
+    pydeflate and DAC1 sources, at a configurable scale.
+
+    The first donors are the EU27 codes used by the analysis. Any extra donors get
+    synthetic codes. Every value is derived from the donor code, the year and the
+    seed, so repeated runs produce the same data.
+
+    Args:
+        donors (int): Number of donors (at least the 27 EU members).
+        first_year (int): First year of historical data.
+        last_year (int): Last year of WEO projections.
+        data_year (int): Latest year with ODA data.
+        seed (int): Seed for the random number generator.
+        latency (float): Seconds each source load waits, to mimic network I/O.
+    """
+
+    def __init__(
+        self,
+        donors: int = 27,
+        first_year: int = 2000,
+        last_year: int = 2029,
+        data_year: int = 2023,
+        seed: int = 42,
+        latency: float = 0.0,
+    ):
+        extra = [30_000 + i for i in range(max(donors - len(EU27_CODES), 0))]
+        self.donors = EU27_CODES[:donors] + extra
+        self.first_year = first_year
+        self.last_year = last_year
+        self.data_year = data_year
+        self.latency = latency
+
+        codes = self.donors + [918, 20918]
+        rng = np.random.default_rng(seed)
+        self._gni = dict(zip(codes, rng.uniform(1e4, 4e6, len(codes))))
+        self._ratio = dict(zip(codes, rng.uniform(0.001, 0.011, len(codes))))
+        self._growth = dict(zip(codes, rng.uniform(-0.01, 0.04, len(codes))))
+        self._inflation = dict(zip(codes, rng.uniform(0.005, 0.05, len(codes))))
+        self._eu_share = dict(zip(codes, rng.uniform(0.05, 0.3, len(codes))))
+
+    def _wait(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _lookup(values: dict, codes, default: float) -> np.ndarray:
+        return pd.Series(codes).map(values).fillna(default).to_numpy(dtype="float64")
+
+    def _growth_index(self, codes, years) -> np.ndarray:
+        growth = self._lookup(self._growth, codes, 0.02)
+        return (1 + growth) ** (np.asarray(years, dtype="int64") - 2000)
+
+    def _price_index(self, codes, years) -> np.ndarray:
+        inflation = self._lookup(self._inflation, codes, 0.02)
+        return (1 + inflation) ** (np.asarray(years, dtype="int64") - 2000)
+
+    def oda(
+        self,
+        years: list[int],
+        donors: list[int],
+        indicators: list[str],
+        currency: str = "USD",
+    ) -> pd.DataFrame:
+        """Stand-in for ODAData(...).load_indicator(...).get_data()."""
+        self._wait()
+        years = [year for year in years if year <= self.data_year]
+        rows = pd.MultiIndex.from_product(
+            [years, donors, indicators], names=["year", "donor_code", "indicator"]
+        ).to_frame(index=False)
+
+        gni = self._lookup(self._gni, rows.donor_code, 1e5) * self._growth_index(
+            rows.donor_code, rows.year
+        )
+        ratio = self._lookup(self._ratio, rows.donor_code, 0.005)
+        fx = 0.9 if currency in ("EUR", "EUI") else 1.0
+
+        return rows.assign(
+            value=np.where(rows.indicator == "gni", gni, gni * ratio) * fx,
+            currency=currency,
+        )
+
+    def weo(self):
+        """Stand-in for the bblocks WorldEconomicOutlook class."""
+        fixtures = self
+
+        class WorldEconomicOutlook:
+            def __init__(self, year: int, release: int):
+                self.indicators = []
+
+            def load_data(self, indicators: list[str]) -> None:
+                fixtures._wait()
+                self.indicators = indicators
+
+            def get_data(self, indicator: str | None = None) -> pd.DataFrame:
+                indicators = [indicator] if indicator else self.indicators
+                years = np.arange(fixtures.first_year, fixtures.last_year + 1)
+                codes = np.repeat(fixtures.donors, len(years))
+                all_years = np.tile(years, len(fixtures.donors))
+
+                real = fixtures._lookup(fixtures._gni, codes, 1e5)
+                real = real * fixtures._growth_index(codes, all_years)
+                prices = 100 * fixtures._price_index(codes, all_years)
+                values = {
+                    "NGDP_R": real,
+                    "NGDP_D": prices,
+                    "NGDPD": real * prices / 100,
+                }
+                iso = np.array([_donor_iso(code) for code in fixtures.donors])
+                dates = pd.to_datetime(years.astype(str))
+
+                # Rows ordered by donor, then indicator, then year
+                shape = (len(fixtures.donors), len(indicators), len(years))
+                stacked = np.stack(
+                    [values[name].reshape(shape[0], shape[2]) for name in indicators],
+                    axis=1,
+                )
+                return pd.DataFrame(
+                    {
+                        "iso_code": np.repeat(iso, shape[1] * shape[2]),
+                        "indicator": np.tile(np.repeat(indicators, shape[2]), shape[0]),
+                        "year": np.tile(dates, shape[0] * shape[1]),
+                        "value": stacked.ravel(),
+                    }
+                )
+
+        return WorldEconomicOutlook
+
+    def deflate(
+        self,
+        df: pd.DataFrame,
+        base_year: int,
+        source_currency: str,
+        target_currency: str,
+        id_column: str,
+        date_column: str,
+        source_column: str,
+        target_column: str,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Stand-in for pydeflate.deflate."""
+        codes = df[id_column].to_numpy()
+        prices = self._price_index(codes, df[date_column]) / self._price_index(
+            codes, np.full(len(df), base_year)
+        )
+        fx = 1.0 if source_currency == target_currency else 0.9
+
+        return df.assign(**{target_column: df[source_column] * fx / prices})
+
+    def pydeflate_dac1(self) -> pd.DataFrame:
+        """Stand-in for the pydeflate DAC1 table, at the same EUR rate as oda."""
+        codes = [*self.donors, 918]
+        years = np.arange(self.first_year, self.data_year + 1)
+        rows = pd.MultiIndex.from_product(
+            [codes, years], names=["donor_code", "year"]
+        ).to_frame(index=False)
+        prices = self._price_index(rows.donor_code, rows.year) / self._price_index(
+            rows.donor_code, np.full(len(rows), self.data_year)
+        )
+        usa = pd.DataFrame({"iso_code": "USA", "year": years, "exchange": 1.0})
+
+        return pd.concat(
+            [
+                rows.assign(
+                    iso_code=rows.donor_code.map(_donor_iso),
+                    exchange=0.9,
+                    deflator=100 * prices,
+                ).drop(columns="donor_code"),
+                usa.assign(deflator=100.0),
+            ],
+            ignore_index=True,
+        ).assign(year=lambda d: pd.to_datetime(d.year, format="%Y"))
+
+    @staticmethod
+    def convert_id(series: pd.Series, *args, additional_mapping=None, **kwargs):
+        """Stand-in for bblocks.convert_id, for the codes used in these fixtures and
+        the EU27 names."""
+        mapping = {**EU27_NAMES, **(additional_mapping or {})}
+        return series.map(
+            lambda iso: mapping.get(iso, int(iso[1:]) if iso[1:].isdigit() else pd.NA)
+        )
+
+    @staticmethod
+    def add_short_names_column(df, id_column, target_column, **kwargs):
+        """Stand-in for bblocks.add_short_names_column."""
+        return df.assign(**{target_column: "Donor " + df[id_column].astype(str)})
+
+    def donor_groupings(self) -> dict:
+        """Stand-in for oda_data.donor_groupings. Every fixture donor is a DAC
+        member."""
+        return {
+            "eu27_countries": {code: f"Donor {code}" for code in EU27_CODES},
+            "dac_members": {code: f"Donor {code}" for code in self.donors},
+        }
+
+    def dac1(
+        self,
+        start_year: int,
+        end_year: int,
+        filters: dict | None = None,
+        donors: list[int] | None = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Stand-in for the DAC1 contributions to the EU Institutions."""
+        donors = self.donors if donors is None else donors
+        years = range(start_year, min(end_year, self.data_year) + 1)
+        rows = pd.MultiIndex.from_product(
+            [years, donors], names=["year", "donor_code"]
+        ).to_frame(index=False)
+        oda = self.oda(
+            list(years),
+            donors,
+            ["total_oda_official_definition"],
+        ).value.to_numpy()
+
+        return rows.assign(
+            value=oda * self._lookup(self._eu_share, rows.donor_code, 0.1)
+        )
+
+
+@contextmanager
+def use_fixtures(fixtures: Fixtures):
+    """Run the pipeline against the fixtures instead of the external sources. The WEO
+    table cache is redirected to a temporary folder, and the original sources are
+    restored on exit."""
+    weo = fixtures.weo()
+    patches = [
+        (sources, "donor_groupings", fixtures.donor_groupings),
+        (sources, "oda_data", fixtures.oda),
+        (sources, "world_economic_outlook", weo),
+        (sources, "deflate", fixtures.deflate),
+        (sources, "convert_id", fixtures.convert_id),
+        (sources, "add_short_names_column", fixtures.add_short_names_column),
+        (sources, "download_dac1", fixtures.dac1),
+        (eu_institutions, "read_dac1_sdmx_filters", fixtures.dac1),
+    ]
+    originals = [(obj, name, getattr(obj, name)) for obj, name, _ in patches]
+    weo_folder = cache.weo_cache.folder
+
+    with tempfile.TemporaryDirectory() as folder:
+        dac1_path = Path(folder) / "pydeflate_dac1.feather"
+        fixtures.pydeflate_dac1().to_feather(dac1_path)
+        dac1 = DeflatorIndex(dac1_path)
+        patches.append((sources, "pydeflate_dac1", lambda: dac1))
+        originals.append((sources, "pydeflate_dac1", sources.pydeflate_dac1))
+
+        try:
+            for obj, name, value in patches:
+                setattr(obj, name, value)
+            cache.weo_cache.folder = Path(folder)
+            cache.weo_cache.clear()
+            cache.oda_cache.clear()
+            horizon.max_data_year.cache_clear()
+            yield fixtures
+        finally:
+            for obj, name, value in originals:
+                setattr(obj, name, value)
+            cache.weo_cache.folder = weo_folder
+            cache.weo_cache.clear()
+            cache.oda_cache.clear()
+            horizon.max_data_year.cache_clear()
@@ -0,0 +1,155 @@
+"""Donor aggregates (EU27, EU28, the lower-target countries, Team Europe or any
+custom set) computed from a donor-to-group membership matrix.
+
+The data is laid out once as a (donor x (year, value)) array, and every group is
+aggregated by the same matrix product. Adding groups does not add passes over the
+data. Membership is stored as sparse (group, donor) pairs and expanded to a dense
+0/1 matrix for the product, which is small for the few dozen DAC donors.
+"""
+
+from typing import Hashable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from scripts import common
+
+
+class DonorGroups:
+    """Membership of donors in named groups. A donor can belong to any number of
+    groups.
+
+    Args:
+        groups (dict[str, Iterable]): Donor ids (DAC codes, names, ...) in each group.
+    """
+
+    def __init__(self, groups: dict[str, Iterable[Hashable]]):
+        self.names = list(groups)
+        members = {name: list(dict.fromkeys(donors)) for name, donors in groups.items()}
+        self.donors = pd.Index(
+            list(dict.fromkeys(d for donors in members.values() for d in donors))
+        )
+
+        # Sparse membership: one (group, donor) pair per member
+        self.pairs = np.array(
+            [
+                (g, self.donors.get_loc(d))
+                for g, name in enumerate(self.names)
+                for d in members[name]
+            ],
+            dtype="int64",
+        ).reshape(-1, 2)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Dense (group x donor) 0/1 membership matrix."""
+        matrix = np.zeros((len(self.names), len(self.donors)))
+        matrix[self.pairs[:, 0], self.pairs[:, 1]] = 1.0
+        return matrix
+
+    def _aggregate(
+        self, df: pd.DataFrame, arrays: list[np.ndarray], by: str, donor_column: str
+    ) -> tuple[np.ndarray, pd.Index]:
+        """Group sums of each array, as a (group x by x array) array. NaN values
+        are skipped, as in a pandas groupby sum."""
+        donor = self.donors.get_indexer(df[donor_column])
+        codes, keys = pd.factorize(df[by], sort=True)
+        keep = (donor >= 0) & (codes >= 0)
+        cell = donor[keep] * len(keys) + codes[keep]
+
+        size = len(self.donors) * len(keys)
+        data = np.stack(
+            [
+                np.bincount(
+                    cell, weights=np.nan_to_num(a[keep], nan=0.0), minlength=size
+                )
+                for a in arrays
+            ],
+            axis=-1,
+        ).reshape(len(self.donors), len(keys) * len(arrays))
+
+        totals = self.matrix @ data
+        return totals.reshape(len(self.names), len(keys), len(arrays)), pd.Index(keys)
+
+    def _frame(
+        self,
+        totals: np.ndarray,
+        keys: pd.Index,
+        columns: list[str],
+        by: str,
+        group_column: str,
+    ) -> pd.DataFrame:
+        rows = len(self.names) * len(keys)
+        return pd.DataFrame(
+            {
+                group_column: np.repeat(self.names, len(keys)),
+                by: np.tile(keys, len(self.names)),
+                **dict(zip(columns, totals.reshape(rows, -1).T)),
+            }
+        )
+
+    def sum(
+        self,
+        df: pd.DataFrame,
+        values: str | list[str],
+        by: str = "year",
+        donor_column: str = "donor_code",
+        group_column: str = "group",
+    ) -> pd.DataFrame:
+        """Sum one or more columns over the members of every group.
+
+        Args:
+            df (pd.DataFrame): Long DataFrame with donor_column, by and the values.
+            values (str | list[str]): Columns to sum.
+            by (str): Column to keep (e.g. the year).
+            donor_column (str): Column with the donor ids.
+            group_column (str): Name of the group column in the output.
+
+        Returns:
+            pd.DataFrame: One row per group and value of by, in group order.
+        """
+        values = [values] if isinstance(values, str) else list(values)
+        arrays = [df[v].to_numpy(dtype="float64", na_value=np.nan) for v in values]
+
+        totals, keys = self._aggregate(df, arrays, by, donor_column)
+
+        return self._frame(totals, keys, values, by, group_column)
+
+    def weighted_average(
+        self,
+        df: pd.DataFrame,
+        value: str,
+        weight: str,
+        by: str = "year",
+        donor_column: str = "donor_code",
+        group_column: str = "group",
+    ) -> pd.DataFrame:
+        """Weighted average of a column over the members of every group. Rows where
+        the value or the weight is missing are skipped.
+
+        Returns:
+            pd.DataFrame: One row per group and value of by, in group order.
+        """
+        x = df[value].to_numpy(dtype="float64", na_value=np.nan)
+        w = df[weight].to_numpy(dtype="float64", na_value=np.nan)
+        valid = ~(np.isnan(x) | np.isnan(w))
+
+        totals, keys = self._aggregate(
+            df, [np.where(valid, x * w, 0.0), np.where(valid, w, 0.0)], by, donor_column
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average = totals[..., :1] / totals[..., 1:]
+
+        return self._frame(average, keys, [value], by, group_column)
+
+
+def standard_groups(extra: dict[str, Iterable[int]] | None = None) -> DonorGroups:
+    """The EU27, EU28, lower-target countries and Team Europe (the EU27 and the EU
+    Institutions), plus any extra groups, keyed on DAC codes."""
+    groups = {
+        "EU27": common.EU27,
+        "EU28": common.EU28,
+        "Lower target": sorted(common.LOWER_TARGET_COUNTRIES),
+        "Team Europe": common.EU27 + [918],
+    }
+    return DonorGroups({**groups, **(extra or {})})
@@ -0,0 +1,167 @@
+"""Per-year store of the Member States' ODA/GNI history and conversion factors.
+
+The store keeps every year fetched so far. When the source publishes a new year,
+only that year is fetched and converted to constant prices, appended to the store
+and written back. The projections, which start after the latest data year, are
+then recomputed from the merged history.
+
+Conversion factors are stored per base year, in a file named after the base
+year, the DAC deflator base year and the WEO vintage. The DAC deflator base year is
+the base year or, if it is later, the latest data year (as in conversion_factors).
+When a new year moves it, or a new WEO vintage is used, the (small) factors table is
+recomputed for every year, so the factors always match a full recompute. Otherwise
+only the factors of new years are computed.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.common import WEO_DEFLATORS_VINTAGE
+from scripts.config import Paths
+from scripts.horizon import max_data_year
+from scripts.instrumentation import instrument
+from scripts.ms_analysis import individual_spending
+from scripts.tools import (
+    conversion_factors,
+    get_constant_deflators,
+    get_gdp_growth_factor,
+)
+
+logger = logging.getLogger(__name__)
+
+_VINTAGE = "-".join(map(str, WEO_DEFLATORS_VINTAGE))
+
+
+def _read(path: Path) -> pd.DataFrame | None:
+    return pd.read_parquet(path) if path.exists() else None
+
+
+def _factors_file(folder: Path, base_year: int, deflate_year: int) -> Path:
+    return folder / f"factors_{base_year}__{deflate_year}__{_VINTAGE}.parquet"
+
+
+@instrument
+def update_spending(start_year: int = 2014, folder: Path | None = None) -> pd.DataFrame:
+    """Append the years missing from the stored ODA/GNI history and return it.
+
+    Args:
+        start_year (int): First year of the history.
+        folder (Path | None): Store folder. Defaults to Paths.history.
+
+    Returns:
+        pd.DataFrame: The history from start_year to the latest data year.
+    """
+    folder = Paths.history if folder is None else folder
+    path = folder / "spending.parquet"
+    stored = _read(path)
+
+    known = None if stored is None else int(stored.year.max())
+    end_year = max_data_year() if known is None else max_data_year(known)
+
+    stored_years = set() if stored is None else set(stored.year)
+    missing = [y for y in range(start_year, end_year + 1) if y not in stored_years]
+
+    if missing:
+        logger.info(f"Fetching ODA/GNI for {missing[0]}-{missing[-1]}")
+        new = individual_spending(
+            start_year=missing[0], currency="EUR", end_year=missing[-1]
+        ).loc[lambda d: d.year.isin(missing)]
+        spending = (
+            pd.concat([stored, new], ignore_index=True) if stored is not None else new
+        ).sort_values(["year", "donor_code"], ignore_index=True)
+        folder.mkdir(parents=True, exist_ok=True)
+        spending.to_parquet(path)
+    else:
+        spending = stored
+
+    return spending.loc[lambda d: d.year.between(start_year, end_year)].reset_index(
+        drop=True
+    )
+
+
+@instrument
+def update_factors(
+    spending: pd.DataFrame, base_year: int = 2025, folder: Path | None = None
+) -> pd.DataFrame:
+    """Compute the conversion factors missing from the store for the
+    (donor_code, year) pairs in spending, and return the factors for those pairs.
+    Stored factors computed with another DAC deflator base year or WEO vintage are
+    discarded.
+
+    Args:
+        spending (pd.DataFrame): DataFrame with donor_code and year columns.
+        base_year (int): Base year for constant prices.
+        folder (Path | None): Store folder. Defaults to Paths.history.
+
+    Returns:
+        pd.DataFrame: DataFrame with donor_code, year and factor columns.
+    """
+    folder = Paths.history if folder is None else folder
+    deflate_year = min(base_year, int(spending.year.max()))
+    path = _factors_file(folder, base_year, deflate_year)
+    stored = _read(path)
+
+    for stale in folder.glob(f"factors_{base_year}__*.parquet"):
+        if stale != path:
+            logger.info(f"Recomputing the {base_year} factors ({stale.name} is stale)")
+            stale.unlink()
+
+    pairs = spending.filter(["donor_code", "year"]).drop_duplicates()
+    if stored is not None:
+        pairs = pairs.merge(
+            stored.filter(["donor_code", "year"]), how="left", indicator=True
+        ).loc[lambda d: d["_merge"] == "left_only", ["donor_code", "year"]]
+
+    if len(pairs):
+        new = conversion_factors(pairs, base_year=base_year, deflate_year=deflate_year)
+        stored = (
+            pd.concat([stored, new], ignore_index=True) if stored is not None else new
+        )
+        folder.mkdir(parents=True, exist_ok=True)
+        stored.to_parquet(path)
+
+    return spending.filter(["donor_code", "year"]).merge(
+        stored, on=["donor_code", "year"], how="left"
+    )
+
+
+@instrument
+def update_projection_inputs(
+    start_year: int = 2014,
+    base_years: int | list[int] = 2025,
+    folder: Path | None = None,
+) -> dict:
+    """Same inputs as ms_analysis.fetch_projection_inputs, served from the
+    per-year store and only fetching and converting the years it is missing.
+
+    Returns:
+        dict: Dictionary with "spending", "factors" and "growth_factors" keys.
+    """
+    if isinstance(base_years, int):
+        base_years = [base_years]
+
+    # The WEO growth factors and deflators do not depend on the stored history, so
+    # they are loaded (into weo_cache) while the missing years are fetched
+    end_year = max_data_year()
+    with ThreadPoolExecutor() as pool:
+        weo = [pool.submit(get_gdp_growth_factor, from_year=end_year)]
+        weo += [
+            pool.submit(get_constant_deflators, base=base_year)
+            for base_year in base_years
+            if base_year > end_year
+        ]
+        spending = update_spending(start_year=start_year, folder=folder)
+        for future in weo:
+            future.result()
+
+    return {
+        "spending": spending,
+        "factors": {
+            base_year: update_factors(spending, base_year=base_year, folder=folder)
+            for base_year in base_years
+        },
+        "growth_factors": get_gdp_growth_factor(from_year=int(spending.year.max())),
+    }
@@ -0,0 +1,59 @@
+"""Detection of the latest year with published ODA data.
+
+Only the years from the latest known data year onwards are queried, so a new
+OECD release costs a query for the new years rather than the whole history. The
+probe goes through oda_cache, so the analysis queries for those years are then
+served from memory.
+"""
+
+import logging
+from datetime import date
+from functools import cache
+
+from scripts import common
+from scripts.cache import oda_cache
+
+logger = logging.getLogger(__name__)
+
+# Latest year known to be published. Detection starts from here.
+LATEST_KNOWN_DATA_YEAR = 2023
+
+
+@cache
+def max_data_year(known: int = LATEST_KNOWN_DATA_YEAR) -> int:
+    """Latest year for which every EU27 member reports ODA, detected from the source.
+
+    Args:
+        known (int): A year known to have data. Only this year and later ones are
+            queried.
+
+    Returns:
+        int: The latest year with data, or `known` if none of the probed years have
+        data for every member.
+    """
+    years = list(range(known, max(known, date.today().year - 1) + 1))
+    donors = common.EU27
+
+    probe = oda_cache.query(
+        years=years,
+        donors=donors + [20918, 918],
+        indicators=["total_oda_official_definition", "gni"],
+        currency=common.CURRENCY,
+    )
+
+    reporting = (
+        probe.loc[
+            lambda d: d.indicator.eq("total_oda_official_definition")
+            & d.donor_code.isin(donors)
+        ]
+        .dropna(subset=["value"])
+        .groupby("year")["donor_code"]
+        .nunique()
+    )
+    complete = reporting.index[reporting >= len(donors)]
+
+    if len(complete) == 0:
+        logger.warning(f"No complete ODA data found from {known}, using {known}")
+        return known
+
+    return int(complete.max())
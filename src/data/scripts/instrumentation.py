@@ -0,0 +1,133 @@
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.config import Paths
+
+logger = logging.getLogger(__name__)
+
+# Records of the run being traced (None when no run is traced) and the stack of
+# stages currently executing
+_records: ContextVar[list | None] = ContextVar("records", default=None)
+_stack: ContextVar[tuple] = ContextVar("stack", default=())
+
+
+def _frame_stats(obj, memory: bool) -> tuple[int | None, float | None]:
+    if isinstance(obj, pd.DataFrame):
+        return len(obj), obj.memory_usage(deep=True).sum() / 1e6 if memory else None
+    return None, None
+
+
+def instrument(func):
+    """Decorator to log the wall time, rows in and out and DataFrame memory change
+    of a pipeline stage. Rows and memory are measured on the first DataFrame
+    argument and on the returned DataFrame. Memory is only measured inside
+    trace_run (measuring it means walking every object column), where the records
+    are also collected for the JSON trace."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        frame_in = next(
+            (a for a in (*args, *kwargs.values()) if isinstance(a, pd.DataFrame)),
+            None,
+        )
+        records = _records.get()
+        rows_in, memory_in = _frame_stats(frame_in, memory=records is not None)
+
+        stack = _stack.get()
+        token = _stack.set(stack + (func.__name__,))
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _stack.reset(token)
+
+        rows_out, memory_out = _frame_stats(result, memory=records is not None)
+        memory_delta = (
+            None if memory_out is None else round(memory_out - (memory_in or 0.0), 4)
+        )
+
+        record = {
+            "stage": func.__name__,
+            "parent": stack[-1] if stack else None,
+            "depth": len(stack),
+            "wall_time_s": round(elapsed, 6),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "memory_in_mb": None if memory_in is None else round(memory_in, 4),
+            "memory_out_mb": None if memory_out is None else round(memory_out, 4),
+            "memory_delta_mb": memory_delta,
+        }
+
+        logger.debug(
+            f"{'  ' * len(stack)}{func.__name__}: {elapsed:.3f}s, "
+            f"rows {rows_in} -> {rows_out}, memory delta {memory_delta} MB"
+        )
+
+        if records is not None:
+            records.append(record)
+
+        return result
+
+    return wrapper
+
+
+@contextmanager
+def trace_run(name: str, folder: Path | None = None, memory: bool = True):
+    """Collect the records of every instrumented stage run inside the block, and
+    write them as a JSON trace when the block exits (even if it fails).
+
+    Args:
+        name (str): Name of the run, used for the trace file name.
+        folder (Path | None): Folder for the trace. Defaults to Paths.traces.
+        memory (bool): Trace allocations with tracemalloc and report the peak
+            memory of the run. Tracing slows the run down.
+    """
+    records = []
+    token = _records.set(records)
+    started = datetime.now()
+    start = time.perf_counter()
+    status = "failed"
+
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if memory:
+        tracemalloc.reset_peak()
+
+    try:
+        yield records
+        status = "completed"
+    finally:
+        _records.reset(token)
+        peak = round(tracemalloc.get_traced_memory()[1] / 1e6, 4) if memory else None
+        if started_tracing:
+            tracemalloc.stop()
+        folder = Paths.traces if folder is None else folder
+        folder.mkdir(parents=True, exist_ok=True)
+        file = folder / f"{name}_{started:%Y%m%dT%H%M%S}.json"
+        file.write_text(
+            json.dumps(
+                {
+                    "run": name,
+                    "started": started.isoformat(timespec="seconds"),
+                    "status": status,
+                    "wall_time_s": round(time.perf_counter() - start, 6),
+                    "peak_memory_mb": peak,
+                    "stages": records,
+                },
+                indent=2,
+            )
+        )
+        if peak is not None:
+            logger.info(f"{name}: peak memory {peak:.1f}MB")
+        logger.info(f"Wrote trace for {name} ({status}) to {file}")
@@ -0,0 +1,34 @@
+"""Shared helpers for the Observable Framework data loaders in src/data.
+
+Each loader (e.g. eu27_chart.csv.py) runs the pipeline for its stage and streams
+the stage's frame to stdout. The pipeline keeps the frames of every stage in
+raw_data/pipeline and only reruns a stage when its inputs changed, so chained
+loaders share those intermediates: eui_spending_chart.csv.py reuses the
+member-state projection computed for eu27_chart.csv.py instead of recomputing it.
+A cold build computes each stage once, and a warm build computes nothing.
+"""
+
+import sys
+from contextlib import redirect_stdout
+
+import pandas as pd
+
+from scripts.outputs import encode
+from scripts.pipeline import STAGES, run_pipeline
+
+
+def load(stage: str) -> pd.DataFrame:
+    """The frame of a pipeline stage, running the stage (and its upstream stages)
+    only if their inputs changed since the last run."""
+    outputs = {s.name: s.outputs[0] for s in STAGES}
+
+    # Only the data goes to stdout: anything the sources print goes to stderr
+    with redirect_stdout(sys.stderr):
+        run_pipeline(targets=[stage])
+        return pd.read_parquet(outputs[stage])
+
+
+def write_stdout(df: pd.DataFrame, fmt: str = "csv") -> None:
+    """Stream a frame to stdout, as Observable data loaders do."""
+    sys.stdout.buffer.write(encode(df, (fmt,))[fmt])
+    sys.stdout.buffer.flush()
@@ -1,9 +1,13 @@
 import logging
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s [%(levelname)s]: %(message)s",
-    datefmt="%H:%M:%S",
-)
 
-logger = logging.getLogger(__name__)
+def configure_logging(level: int = logging.DEBUG) -> None:
+    """Log the messages of the scripts package (and of the module run as a script)
+    to stderr at the given level. Other libraries keep the default level, so only
+    their warnings and errors are shown. Called by the command line entry points
+    only, so importing the package does not change the logging configuration."""
+    logging.basicConfig(
+        format="%(asctime)s [%(levelname)s]: %(message)s", datefmt="%H:%M:%S"
+    )
+    for name in ("scripts", "__main__"):
+        logging.getLogger(name).setLevel(level)
@@ -1,28 +1,40 @@
 import pandas as pd
-from oda_data import ODAData
 
-from scripts.common import EU27, LOWER_TARGET, LOWER_TARGET_COUNTRIES, TARGET
-from scripts.config import Paths
+from scripts import common
+from scripts.cache import oda_cache
+from scripts.checkpoints import Checkpoints, checkpoint
+from scripts.groups import DonorGroups
+from scripts.horizon import max_data_year
+from scripts.instrumentation import instrument, trace_run
+from scripts.projection_core import arrays_to_chart, project_arrays
+from scripts.targets import target_array
 from scripts.tools import (
+    conversion_factors,
     to_constant,
     get_gdp_growth_factor,
     extend_deflators_to_year,
     add_member_state_names,
 )
 
-MAX_DATA_YEAR = 2023
-
 
+@instrument
 def get_total_oda_and_gni(
-    years: int | list[int] = 2023, currency: str = "EUR"
+    years: int | list[int] | None = None,
+    currency: str = "EUR",
+    donors: list[int] | None = None,
 ) -> pd.DataFrame:
-
-    oda = ODAData(years=years, donors=EU27 + [20918, 918], currency=currency)
-
-    oda.load_indicator(["total_oda_official_definition", "gni"])
+    if years is None:
+        years = max_data_year()
+    if donors is None:
+        donors = common.EU27
 
     df = (
-        oda.get_data()
+        oda_cache.query(
+            years=years,
+            donors=list(donors) + [20918, 918],
+            indicators=["total_oda_official_definition", "gni"],
+            currency=currency,
+        )
         .pivot(index=["year", "donor_code"], columns="indicator", values="value")
         .reset_index()
     )
@@ -30,26 +42,33 @@ def get_total_oda_and_gni(
     return df
 
 
+@instrument
 def calculate_oda_gni_ratio(df: pd.DataFrame) -> pd.DataFrame:
 
-    df["oda_gni_ratio"] = df["total_oda_official_definition"] / df["gni"]
-
-    return df
+    return df.assign(oda_gni_ratio=df["total_oda_official_definition"] / df["gni"])
 
 
-def add_target_column(df: pd.DataFrame) -> pd.DataFrame:
-    df["target"] = df.donor_code.map(
-        lambda x: LOWER_TARGET if x in LOWER_TARGET_COUNTRIES else TARGET
-    )
-
-    return df
+@instrument
+def add_target_column(
+    df: pd.DataFrame, targets: dict[int, float] | None = None
+) -> pd.DataFrame:
+    """Add each donor's ODA/GNI target, from a {donor_code: target} table (the
+    default targets if None, see scripts.targets)."""
+    return df.assign(target=target_array(df.donor_code, targets))
 
 
+@instrument
 def _get_gni_targets_from_target_year(
     oda_df: pd.DataFrame, target_year: int, projections_end_year: int
 ):
     # latest data
-    latest = oda_df.loc[oda_df.year == MAX_DATA_YEAR].copy()
+    latest_year = oda_df.year.max()
+    if target_year <= latest_year:
+        raise ValueError(
+            f"The target year ({target_year}) must be after the latest year with "
+            f"data ({latest_year})"
+        )
+    latest = oda_df.loc[oda_df.year == latest_year]
 
     at_target = latest.loc[lambda d: d.oda_gni_ratio >= d.target]
     below_target = latest.loc[lambda d: d.oda_gni_ratio < d.target]
@@ -66,46 +85,48 @@ def _get_gni_targets_from_target_year(
     return df
 
 
+@instrument
 def _interpolate_gni_projections(
     df: pd.DataFrame,
     start_year: int,
     projections_end_year: int,
 ):
-    # for every donor, linearly interpolate any oda_gni_ratio that is missing
-    years = pd.DataFrame({"year": range(start_year, projections_end_year + 1)})
-
-    interpolated_data = []
-
-    for donor in df.donor_code.unique():
-        donor_data = df.loc[lambda d: d.donor_code == donor].copy()
-        donor_data = donor_data.merge(years, on="year", how="right").fillna(
-            {"donor_code": donor}
-        )
-        donor_data = donor_data.sort_values("year").interpolate(method="linear")
-
-        donor_data = donor_data.astype({"donor_code": "Int32"})
-
-        interpolated_data.append(donor_data)
+    # for every donor, linearly interpolate any oda_gni_ratio that is missing.
+    # All donors are interpolated at once, as columns of a (year x donor) matrix.
+    years = pd.Index(range(start_year, projections_end_year + 1), name="year")
+    donors = pd.Index(df.donor_code.unique(), name="donor_code")
+
+    wide = (
+        df.pivot(index="year", columns="donor_code", values="oda_gni_ratio")
+        .reindex(index=years, columns=donors)
+        .astype("float64")
+        .interpolate(method="linear")
+    )
 
-    return pd.concat(interpolated_data, ignore_index=True)
+    return (
+        wide.melt(value_name="oda_gni_ratio", ignore_index=False)
+        .reset_index()
+        .filter(["year", "donor_code", "oda_gni_ratio"])
+        .astype({"donor_code": "Int32"})
+    )
 
 
+@instrument
 def individual_gni_targets(
     start_year: int = 2018,
     target_year: int = 2030,
     projections_end_year: int = 2034,
+    oda_df: pd.DataFrame | None = None,
+    targets: dict[int, float] | None = None,
 ):
-    years = list(range(start_year, MAX_DATA_YEAR + 1))
-    # Get spending data
-    oda_df = get_total_oda_and_gni(years=years, currency="EUR").loc[
-        lambda d: d.donor_code != 918
-    ]
-
-    # Add ODA/GNI
-    oda_df = calculate_oda_gni_ratio(oda_df)
+    if oda_df is None:
+        # Get spending data, with ODA/GNI
+        oda_df = individual_spending(start_year=start_year, currency="EUR")
+    else:
+        oda_df = oda_df.loc[lambda d: d.year >= start_year]
 
     # Add targets
-    oda_df = add_target_column(oda_df)
+    oda_df = add_target_column(oda_df, targets=targets)
 
     # Get GNI targets
     df = _get_gni_targets_from_target_year(
@@ -115,15 +136,20 @@ def individual_gni_targets(
     return _interpolate_gni_projections(df, start_year, projections_end_year)
 
 
+@instrument
 def individual_spending(
     start_year: int = 2018,
     currency: str = "EUR",
+    end_year: int | None = None,
+    donors: list[int] | None = None,
 ) -> pd.DataFrame:
     # Data years
-    years = list(range(start_year, MAX_DATA_YEAR + 1))
+    if end_year is None:
+        end_year = max_data_year()
+    years = list(range(start_year, end_year + 1))
 
     # Get spending data
-    oda_df = get_total_oda_and_gni(years=years, currency=currency).loc[
+    oda_df = get_total_oda_and_gni(years=years, currency=currency, donors=donors).loc[
         lambda d: d.donor_code != 918
     ]
 
@@ -133,22 +159,27 @@ def individual_spending(
     return oda_df
 
 
+@instrument
 def get_gni_projections(
     oda_df: pd.DataFrame | None = None,
     last_year: int = 2034,
     prices: str = "current",
     base_year: int | None = None,
     rolling_window: int = 3,
+    growth_factors: pd.DataFrame | None = None,
 ) -> pd.DataFrame:
 
     if oda_df is None:
         oda_df = (
-            get_total_oda_and_gni([2023])
+            get_total_oda_and_gni()
             .filter(["year", "donor_code", "gni"])
             .dropna(subset=["gni"])
         )
 
-    deflators = get_gdp_growth_factor(from_year=oda_df.year.max())
+    if growth_factors is None:
+        growth_factors = get_gdp_growth_factor(from_year=oda_df.year.max())
+
+    deflators = growth_factors
 
     deflators = deflators.pipe(
         extend_deflators_to_year, last_year, rolling_window=rolling_window
@@ -158,42 +189,123 @@ def get_gni_projections(
         deflators, left_on="donor_code", right_on="dac_code", how="right"
     )
 
-    gni_projection["gni"] = gni_projection["gni"].astype(float)
-    gni_projection["value"] = gni_projection["value"].astype(float)
-
-    gni_projection["gni"] = gni_projection["gni"] * gni_projection["value"]
+    gni_projection["gni"] = gni_projection["gni"].astype(float) * gni_projection[
+        "value"
+    ].astype(float)
 
     return gni_projection.filter(["year", "donor_code", "gni"])
 
 
+@instrument
+def fetch_projection_inputs(
+    start_year: int = 2014,
+    base_years: int | list[int] = 2025,
+    donors: list[int] | None = None,
+) -> dict:
+    """Fetches the source data shared by every projection scenario: the ODA and GNI
+    history, the constant price conversion factors (one table per base year) and
+    the GDP growth factors.
+
+    donors are the DAC codes of the donors to project (the EU27 if None, see
+    common.EU27 and common.DAC_MEMBERS). The EU Institutions are always added.
+
+    Returns:
+        dict: Dictionary with "spending", "factors" and "growth_factors" keys.
+    """
+    if isinstance(base_years, int):
+        base_years = [base_years]
+
+    spending = individual_spending(start_year=start_year, currency="EUR", donors=donors)
+
+    return {
+        "spending": spending,
+        "factors": {
+            base_year: conversion_factors(spending, base_year=base_year, eu_list=donors)
+            for base_year in base_years
+        },
+        "growth_factors": get_gdp_growth_factor(
+            from_year=int(spending.year.max()), donors=donors
+        ),
+    }
+
+
+@instrument
 def eu_spending_projections(
-    start_year: int = 2014, end_year: int = 2034, base_year: int = 2025
+    start_year: int = 2014,
+    end_year: int = 2034,
+    base_year: int = 2025,
+    target_year: int = 2030,
+    rolling_window: int = 3,
+    inputs: dict | None = None,
+    checkpoints: Checkpoints | None = None,
+    targets: dict[int, float] | None = None,
 ) -> pd.DataFrame:
-    """"""
-
-    targets = individual_gni_targets(
-        start_year=start_year, projections_end_year=end_year
-    ).assign(indicator=f"GNI targets")
-
-    historical_constant = individual_spending(
-        start_year=start_year, currency="EUR"
-    ).pipe(to_constant, base_year=base_year)
-
-    constant_projections = get_gni_projections(
-        oda_df=historical_constant.loc[lambda d: d.year == d.year.max()]
-        .filter(["year", "donor_code", "gni"])
-        .dropna(subset=["gni"]),
-        last_year=end_year,
-        prices="constant",
-        base_year=base_year,
-        rolling_window=3,
-    ).assign(prices="constant", base_year=base_year)
+    """Projects the ODA needed by each Member State to reach its target by the
+    target year, in constant prices.
+
+    Args:
+        start_year (int): First year of the data.
+        end_year (int): Last year of the projections.
+        base_year (int): Base year for constant prices.
+        target_year (int): Year by which the targets are met.
+        rolling_window (int): Years used for the average growth after the WEO horizon.
+        inputs (dict | None): Prefetched inputs (see fetch_projection_inputs). They
+            are fetched if not provided.
+        checkpoints (Checkpoints | None): Store the targets, historical_constant
+            and constant_projections intermediates, and load them instead of
+            recomputing them when the run is resumed.
+        targets (dict[int, float] | None): ODA/GNI target of each donor (see
+            scripts.targets). The default targets if None.
+    """
+    stored = checkpoints is not None and checkpoints.stored(
+        "targets", "historical_constant", "constant_projections"
+    )
+    if inputs is None and not stored:
+        inputs = fetch_projection_inputs(start_year=start_year, base_years=base_year)
+
+    def spending() -> pd.DataFrame:
+        return inputs["spending"].loc[lambda d: d.year >= start_year]
+
+    gni_targets = checkpoint(
+        checkpoints,
+        "targets",
+        lambda: individual_gni_targets(
+            start_year=start_year,
+            target_year=target_year,
+            projections_end_year=end_year,
+            oda_df=spending(),
+            targets=targets,
+        ).assign(indicator=f"GNI targets"),
+    )
+
+    historical_constant = checkpoint(
+        checkpoints,
+        "historical_constant",
+        lambda: spending().pipe(
+            to_constant, base_year=base_year, factors=inputs["factors"][base_year]
+        ),
+    )
+
+    constant_projections = checkpoint(
+        checkpoints,
+        "constant_projections",
+        lambda: get_gni_projections(
+            oda_df=historical_constant.loc[lambda d: d.year == d.year.max()]
+            .filter(["year", "donor_code", "gni"])
+            .dropna(subset=["gni"]),
+            last_year=end_year,
+            prices="constant",
+            base_year=base_year,
+            rolling_window=rolling_window,
+            growth_factors=inputs["growth_factors"],
+        ).assign(prices="constant", base_year=base_year),
+    )
 
     constant_spending = pd.concat(
         [historical_constant, constant_projections], ignore_index=True
     )
 
-    constant_data = targets.merge(
+    constant_data = gni_targets.merge(
         constant_spending,
         on=["year", "donor_code"],
         how="left",
@@ -215,8 +327,16 @@ def eu_spending_projections(
     )
 
 
+@instrument
 def load_and_prepare_data(
-    start_year: int, end_year: int, base_year: int
+    start_year: int,
+    end_year: int,
+    base_year: int,
+    target_year: int = 2030,
+    rolling_window: int = 3,
+    inputs: dict | None = None,
+    checkpoints: Checkpoints | None = None,
+    targets: dict[int, float] | None = None,
 ) -> pd.DataFrame:
     """Loads EU spending projections and prepares the data with targets and ODA/GNI ratio.
 
@@ -224,17 +344,25 @@ def load_and_prepare_data(
         pd.DataFrame: DataFrame containing prepared data.
     """
     df = eu_spending_projections(
-        start_year=start_year, end_year=end_year, base_year=base_year
-    ).pipe(add_target_column)
-
-    # Transform the target from percentage to absolute value
-    df["target"] *= df["gni"]
-
-    # Transform the ratio to percentage
-    df["oda_gni_ratio"] *= 100
-    return df
+        start_year=start_year,
+        end_year=end_year,
+        base_year=base_year,
+        target_year=target_year,
+        rolling_window=rolling_window,
+        inputs=inputs,
+        checkpoints=checkpoints,
+        targets=targets,
+    ).pipe(add_target_column, targets=targets)
+
+    return df.assign(
+        # Transform the target from percentage to absolute value
+        target=df["target"] * df["gni"],
+        # Transform the ratio to percentage
+        oda_gni_ratio=df["oda_gni_ratio"] * 100,
+    )
 
 
+@instrument
 def rename_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Renames columns to human-readable names.
 
@@ -254,6 +382,7 @@ def rename_columns(df: pd.DataFrame) -> pd.DataFrame:
     )
 
 
+@instrument
 def filter_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Filters columns to keep only the required ones.
 
@@ -266,22 +395,31 @@ def filter_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df.filter(["Year", "Member State", "ODA/GNI ratio", "ODA", "Target", "gni"])
 
 
-def calculate_eu_totals(df: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def calculate_eu_totals(df: pd.DataFrame, name: str = "EU27 Countries") -> pd.DataFrame:
     """Calculates EU27 totals for ODA and GNI and appends them to the DataFrame.
 
     Args:
         df (pd.DataFrame): Original DataFrame with individual country data.
+        name (str): Name of the totals (e.g. for another donor set).
 
     Returns:
         pd.DataFrame: DataFrame with EU27 totals appended.
     """
-    eu_totals = df.groupby("Year")[["ODA", "Target", "gni"]].sum().reset_index()
-    eu_totals["Member State"] = "EU27 Countries"
+    groups = DonorGroups({name: df["Member State"].dropna().unique()})
+    eu_totals = groups.sum(
+        df,
+        ["ODA", "Target", "gni"],
+        by="Year",
+        donor_column="Member State",
+        group_column="Member State",
+    ).filter(["Year", "ODA", "Target", "gni", "Member State"])
     eu_totals["ODA/GNI ratio"] = 100 * eu_totals["ODA"] / eu_totals["gni"]
 
     return pd.concat([eu_totals, df], ignore_index=True).drop(columns=["gni"])
 
 
+@instrument
 def clean_data_for_viz(df: pd.DataFrame) -> pd.DataFrame:
     """Rounds and calculates the missing target column, finalizing the DataFrame.
 
@@ -291,36 +429,94 @@ def clean_data_for_viz(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Finalized DataFrame.
     """
-    df["ODA/GNI ratio"] = df["ODA/GNI ratio"].round(2)
-    df["ODA"] = df["ODA"].round(0)
-    df["Missing to target"] = (df["Target"] - df["ODA"]).clip(0).round(0)
-
-    return df.drop(columns=["Target"])
+    return df.assign(
+        **{
+            "ODA/GNI ratio": lambda d: d["ODA/GNI ratio"].round(2),
+            "ODA": lambda d: d["ODA"].round(0),
+            # From the rounded ODA
+            "Missing to target": lambda d: (d["Target"] - d["ODA"]).clip(0).round(0),
+        }
+    ).drop(columns=["Target"])
 
 
+@instrument
 def main_column_chart_with_projections(
-    start_year: int = 2014, end_year: int = 2034, base_year: int = 2025
+    start_year: int = 2014,
+    end_year: int = 2034,
+    base_year: int = 2025,
+    target_year: int = 2030,
+    rolling_window: int = 3,
+    inputs: dict | None = None,
+    engine: str = "pandas",
+    checkpoints: Checkpoints | None = None,
+    donors: list[int] | None = None,
+    targets: dict[int, float] | None = None,
+    total_name: str = "EU27 Countries",
 ) -> pd.DataFrame:
     """Main processing function for ODA data.
 
+    The "pandas" engine (default) builds the data through a chain of DataFrame
+    operations. The "numpy" engine computes the same numbers as dense
+    (donor x year) arrays and only builds the DataFrame at the end.
+
+    With checkpoints (pandas engine only), the intermediates of
+    eu_spending_projections are stored so that a failed run can be resumed.
+
+    The EU27 are projected with the default targets unless donors (DAC codes,
+    ignored when inputs are provided) and targets ({donor_code: target}, see
+    scripts.targets) are given. The totals are named total_name.
+
     Returns:
         pd.DataFrame: Final DataFrame ready for output.
     """
+    if engine == "numpy":
+        if inputs is None:
+            inputs = fetch_projection_inputs(
+                start_year=start_year, base_years=base_year, donors=donors
+            )
+        arrays = project_arrays(
+            inputs=inputs,
+            start_year=start_year,
+            end_year=end_year,
+            base_year=base_year,
+            target_year=target_year,
+            rolling_window=rolling_window,
+            max_data_year=int(inputs["spending"].year.max()),
+            targets=targets,
+        )
+        return arrays_to_chart(arrays, total_name).pipe(clean_data_for_viz)
+
+    if engine != "pandas":
+        raise ValueError(f"Unknown engine: {engine}")
+
+    if inputs is None and donors is not None:
+        inputs = fetch_projection_inputs(
+            start_year=start_year, base_years=base_year, donors=donors
+        )
+
     data = (
         load_and_prepare_data(
-            start_year=start_year, end_year=end_year, base_year=base_year
+            start_year=start_year,
+            end_year=end_year,
+            base_year=base_year,
+            target_year=target_year,
+            rolling_window=rolling_window,
+            inputs=inputs,
+            checkpoints=checkpoints,
+            targets=targets,
         )
         .pipe(add_member_state_names)
         .pipe(rename_columns)
         .pipe(filter_columns)
         .sort_values(["Member State", "Year"])
-        .pipe(calculate_eu_totals)
+        .pipe(calculate_eu_totals, name=total_name)
         .pipe(clean_data_for_viz)
     )
 
     return data
 
 
+@instrument
 def calculate_mff_total_ms(df: pd.DataFrame) -> pd.DataFrame:
     """Calculates the total MFF contributions for each Member State.
 
@@ -339,10 +535,31 @@ def calculate_mff_total_ms(df: pd.DataFrame) -> pd.DataFrame:
 
 
 if __name__ == "__main__":
-    df = main_column_chart_with_projections()
-    # Save to parquet for later use
-    df.to_parquet(Paths.app_data / "eu27_chart.parquet")
-    # Save to csv for Flourish
-    df.to_csv(Paths.app_data / "eu27_chart.csv", index=False)
+    from scripts.history import update_projection_inputs
+    from scripts.logger import configure_logging
+    from scripts.outputs import write_outputs
+
+    configure_logging()
+
+    with trace_run("ms_analysis"):
+        # Only the years missing from the history store are fetched and converted
+        inputs = update_projection_inputs()
+
+        # A failed run resumes from the intermediates already computed
+        params = {
+            "start_year": 2014,
+            "end_year": 2034,
+            "base_year": 2025,
+            "target_year": 2030,
+            "rolling_window": 3,
+        }
+        checkpoints = Checkpoints("ms_analysis", params)
+        df = main_column_chart_with_projections(
+            inputs=inputs, checkpoints=checkpoints, **params
+        )
+        # Save to parquet for later use and to csv for Flourish. Files whose
+        # content has not changed are not rewritten.
+        write_outputs(df, "eu27_chart", formats=("parquet", "csv"))
+        checkpoints.clear()
 
-    mff = calculate_mff_total_ms(df)
+        mff = calculate_mff_total_ms(df)
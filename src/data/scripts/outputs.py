@@ -0,0 +1,109 @@
+"""Writing the analysis outputs.
+
+A result is converted to Arrow once, and every requested format is encoded in
+memory from it: parquet and JSON from the Arrow table, CSV with pandas (to keep
+the format of the published files). A file is only rewritten when the hash of
+its new content differs from the file on disk, so unchanged outputs keep their
+bytes and modification time and do not trigger the Observable build and deploy.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.config import Paths
+from scripts.instrumentation import instrument
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("parquet", "csv", "json")
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def encode(df: pd.DataFrame, formats: tuple[str, ...] = ("parquet", "csv")) -> dict:
+    """Encode a DataFrame in each format, in memory.
+
+    Returns:
+        dict[str, bytes]: The encoded content, by format.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown formats: {unknown}")
+
+    # Same table (and bytes) as DataFrame.to_parquet
+    table = pa.Table.from_pandas(df)
+    content = {}
+
+    if "parquet" in formats:
+        buffer = pa.BufferOutputStream()
+        pq.write_table(table, buffer)
+        content["parquet"] = buffer.getvalue().to_pybytes()
+    if "csv" in formats:
+        content["csv"] = df.to_csv(index=False).encode()
+    if "json" in formats:
+        # Missing values are nulls in the Arrow table
+        content["json"] = json.dumps(
+            table.select(list(df.columns)).to_pylist(), separators=(",", ":")
+        ).encode()
+
+    return content
+
+
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Write data to path unless the file already has the same content.
+
+    Returns:
+        bool: Whether the file was written.
+    """
+    if path.exists() and _digest(path.read_bytes()) == _digest(data):
+        logger.info(f"{path.name}: unchanged")
+        return False
+
+    # Written under a temporary name, so readers never see a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(path.suffix + ".partial")
+    partial.write_bytes(data)
+    partial.replace(path)
+    logger.info(f"{path.name}: written")
+
+    return True
+
+
+@instrument
+def write_outputs(
+    df: pd.DataFrame,
+    name: str,
+    formats: tuple[str, ...] = ("parquet", "csv"),
+    folder: Path | None = None,
+) -> dict[Path, bool]:
+    """Write a result in one or more formats, skipping files whose content has not
+    changed.
+
+    Args:
+        df (pd.DataFrame): The result.
+        name (str): File name, without extension.
+        formats (tuple[str, ...]): Any of "parquet", "csv" and "json".
+        folder (Path | None): Output folder. Defaults to Paths.pipeline, outside the
+            Observable source root, where files would take precedence over the
+            data loaders.
+
+    Returns:
+        dict[Path, bool]: Whether each file was written.
+    """
+    folder = Paths.pipeline if folder is None else folder
+
+    written = {}
+    for fmt, data in encode(df, formats).items():
+        path = folder / f"{name}.{fmt}"
+        written[path] = write_if_changed(path, data)
+
+    return written
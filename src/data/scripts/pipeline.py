@@ -0,0 +1,388 @@
+"""Incremental runner for the analysis pipeline.
+
+Each stage declares its inputs (upstream stages, data files, source vintages,
+parameters and the modules it runs). The code of a stage is every module those
+modules import from the scripts package, directly or not. A stage is only rerun
+when the fingerprint of those inputs changes or one of its outputs is missing.
+Independent stages run concurrently. Stages that ran hand their result to their
+downstream stages in memory; the outputs of skipped stages are read from disk. Run
+from src/data:
+
+    python -m scripts.pipeline            # refresh what changed
+    python -m scripts.pipeline --force    # rerun every stage
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+from scripts.checkpoints import Checkpoints
+from scripts.common import WEO_DEFLATORS_VINTAGE, WEO_GROWTH_VINTAGE
+from scripts.config import Paths
+from scripts.logger import configure_logging
+from scripts.outputs import write_outputs
+from scripts.targets import TARGETS_FILE
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """A pipeline stage.
+
+    Args:
+        name (str): Stage name.
+        run (Callable): Function that takes the parameters as keyword arguments
+            (and, if the stage has upstream stages, their results as upstream),
+            writes the outputs and returns its result.
+        outputs (list[Path]): Files written by the stage.
+        depends_on (tuple[str, ...]): Upstream stages. Their outputs are part of
+            this stage's fingerprint.
+        files (tuple[Path, ...]): Data files read by the stage.
+        code (tuple[str, ...]): Modules (in the scripts folder) the stage runs. The
+            modules they import are part of its code too.
+        vintages (dict | None): Source vintages used by the stage.
+        params (dict | None): Parameters passed to run.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[..., pd.DataFrame | None],
+        outputs: list[Path],
+        depends_on: tuple[str, ...] = (),
+        files: tuple[Path, ...] = (),
+        code: tuple[str, ...] = (),
+        vintages: dict | None = None,
+        params: dict | None = None,
+    ):
+        self.name = name
+        self.run = run
+        self.outputs = outputs
+        self.depends_on = depends_on
+        self.files = files
+        self.code = code
+        self.vintages = vintages or {}
+        self.params = params or {}
+
+
+def _file_hash(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    if path.is_dir():
+        for file in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(file.read_bytes())
+    else:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _imports(module: str) -> set[str]:
+    """Modules of the scripts package imported by a module, anywhere in its code."""
+    path = Paths.scripts / f"{module}.py"
+    if not path.exists():
+        return set()
+
+    imported = set()
+    for node in ast.walk(ast.parse(path.read_text())):
+        if isinstance(node, ast.ImportFrom) and node.module == "scripts":
+            imported.update(f"scripts.{alias.name}" for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            imported.add(node.module)
+        elif isinstance(node, ast.Import):
+            imported.update(alias.name for alias in node.names)
+
+    return {
+        name.removeprefix("scripts.")
+        for name in imported
+        if name.startswith("scripts.")
+    }
+
+
+def code_modules(modules: tuple[str, ...]) -> list[str]:
+    """The modules and every module of the scripts package they import, directly
+    or through other modules."""
+    found, pending = set(), list(modules)
+    while pending:
+        module = pending.pop()
+        if module not in found:
+            found.add(module)
+            pending.extend(_imports(module))
+    return sorted(found)
+
+
+def fingerprint(stage: Stage, stages: dict[str, Stage]) -> str:
+    """Hash of everything a stage's output depends on."""
+    content = {
+        "params": stage.params,
+        "vintages": stage.vintages,
+        "files": {str(f): _file_hash(f) for f in stage.files},
+        "code": {
+            m: _file_hash(Paths.scripts / f"{m}.py") for m in code_modules(stage.code)
+        },
+        "upstream": {
+            str(f): _file_hash(f)
+            for name in stage.depends_on
+            for f in stages[name].outputs
+        },
+    }
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+# --------------------------------------------------------------------------
+# Stages
+# --------------------------------------------------------------------------
+
+# Intermediate frames, also read by the Observable data loaders (see loaders.py)
+MS_CHART_PARQUET = Paths.pipeline / "eu27_chart.parquet"
+EUI_OWN_RESOURCES = Paths.pipeline / "eui_own_resources.parquet"
+EUI_CHART_PARQUET = Paths.pipeline / "eui_spending_chart.parquet"
+
+DATA_UPDATES = Paths.raw_data / "data_updates.json"
+WEO_VINTAGES = {"deflators": WEO_DEFLATORS_VINTAGE, "growth": WEO_GROWTH_VINTAGE}
+
+
+def _member_states(start_year: int, end_year: int, base_year: int) -> pd.DataFrame:
+    from scripts.history import update_projection_inputs
+    from scripts.ms_analysis import main_column_chart_with_projections
+
+    params = {"start_year": start_year, "end_year": end_year, "base_year": base_year}
+    checkpoints = Checkpoints("member_states", params)
+
+    # Only the years missing from the history store are fetched and converted
+    inputs = update_projection_inputs(start_year=start_year, base_years=base_year)
+    df = main_column_chart_with_projections(
+        inputs=inputs, checkpoints=checkpoints, **params
+    )
+    write_outputs(df, MS_CHART_PARQUET.stem, formats=("parquet",))
+    checkpoints.clear()
+
+    return df
+
+
+def _eui_own_resources() -> pd.DataFrame:
+    from scripts.eu_institutions import (
+        OWN_RESOURCES_CHECKPOINTS,
+        eu_own_resources_constant_eur,
+        own_resources_checkpoints,
+    )
+    from scripts.prefetch import prefetch
+
+    checkpoints = own_resources_checkpoints("eui_own_resources")
+    # A resumed run does not fetch the inputs it has already converted
+    if checkpoints.stored(*OWN_RESOURCES_CHECKPOINTS):
+        inputs = {}
+    else:
+        inputs = prefetch(member_states=False)
+    df = eu_own_resources_constant_eur(
+        eu28_contributions=inputs.get("eu28_contributions"),
+        eu27_contributions=inputs.get("eu27_contributions"),
+        checkpoints=checkpoints,
+    )
+    write_outputs(df, EUI_OWN_RESOURCES.stem, formats=("parquet",))
+    checkpoints.clear()
+
+    return df
+
+
+def _upstream(upstream: dict, name: str, path: Path) -> pd.DataFrame:
+    """The result of an upstream stage, or its output file if it was skipped."""
+    df = upstream.get(name)
+    return pd.read_parquet(path) if df is None else df
+
+
+def _eui_spending_chart(upstream: dict) -> pd.DataFrame:
+    from scripts.eu_institutions import eui_spending_chart
+
+    eui = eui_spending_chart(
+        _upstream(upstream, "member_states", MS_CHART_PARQUET),
+        own_resources=_upstream(upstream, "eui_own_resources", EUI_OWN_RESOURCES),
+    )
+    write_outputs(eui, EUI_CHART_PARQUET.stem, formats=("parquet",))
+
+    return eui
+
+
+STAGES = [
+    Stage(
+        name="member_states",
+        run=_member_states,
+        outputs=[MS_CHART_PARQUET],
+        files=(DATA_UPDATES, TARGETS_FILE),
+        code=("checkpoints", "history", "ms_analysis", "outputs"),
+        vintages=WEO_VINTAGES,
+        params={"start_year": 2014, "end_year": 2034, "base_year": 2025},
+    ),
+    Stage(
+        name="eui_own_resources",
+        run=_eui_own_resources,
+        outputs=[EUI_OWN_RESOURCES],
+        files=(DATA_UPDATES, Paths.raw_data / "table1_raw_2014_2023.parquet"),
+        code=("checkpoints", "eu_institutions", "outputs", "prefetch"),
+        vintages=WEO_VINTAGES,
+    ),
+    Stage(
+        name="eui_spending_chart",
+        run=_eui_spending_chart,
+        outputs=[EUI_CHART_PARQUET],
+        depends_on=("member_states", "eui_own_resources"),
+        code=("eu_institutions", "outputs"),
+    ),
+]
+
+
+# --------------------------------------------------------------------------
+# Runner
+# --------------------------------------------------------------------------
+
+
+def _load_state(path: Path) -> dict:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+@contextmanager
+def _locked(path: Path):
+    """Hold an exclusive lock on a file, so that concurrent runs (e.g. data loaders
+    run in parallel by Observable) wait for each other instead of computing the
+    same stages twice."""
+    import fcntl
+
+    with open(path, "w") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def _with_upstream(stages: dict[str, Stage], targets: list[str]) -> dict:
+    """The target stages and every stage they depend on, in pipeline order."""
+    selected = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in stages:
+            raise ValueError(f"Unknown stage {name}")
+        if name not in selected:
+            selected.add(name)
+            todo.extend(stages[name].depends_on)
+
+    return {name: stage for name, stage in stages.items() if name in selected}
+
+
+def run_pipeline(
+    stages: list[Stage] | None = None,
+    force: bool = False,
+    max_workers: int | None = None,
+    state_file: Path | None = None,
+    targets: list[str] | None = None,
+) -> dict[str, str]:
+    """Run the pipeline, skipping stages whose inputs have not changed. Only one
+    run at a time holds the state file; other runs wait for it to finish.
+
+    Args:
+        stages (list[Stage] | None): Stages to run. Defaults to STAGES.
+        force (bool): Rerun every stage, whatever its fingerprint.
+        max_workers (int | None): Number of stages that can run at the same time.
+        state_file (Path | None): File where fingerprints are stored. Defaults to
+            Paths.pipeline_state.
+        targets (list[str] | None): Only run these stages and their upstream
+            stages. Defaults to every stage.
+
+    Returns:
+        dict[str, str]: "ran" or "skipped" for each stage.
+    """
+    stages = {s.name: s for s in (STAGES if stages is None else stages)}
+    state_file = Paths.pipeline_state if state_file is None else state_file
+
+    for stage in stages.values():
+        missing = set(stage.depends_on) - set(stages)
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages {missing}")
+
+    if targets is not None:
+        stages = _with_upstream(stages, targets)
+
+    with _locked(state_file.with_suffix(".lock")):
+        return _run(stages, _load_state(state_file), state_file, force, max_workers)
+
+
+def _run(
+    stages: dict[str, Stage],
+    state: dict,
+    state_file: Path,
+    force: bool,
+    max_workers: int | None,
+) -> dict[str, str]:
+    """Schedule the stages, running those whose fingerprint changed."""
+    status: dict[str, str] = {}
+    results: dict[str, pd.DataFrame | None] = {}
+    pending = dict(stages)
+    running = {}
+
+    def submit_ready(pool: ThreadPoolExecutor) -> None:
+        progress = True
+        while progress:
+            progress = False
+            for name, stage in list(pending.items()):
+                if any(dep not in status for dep in stage.depends_on):
+                    continue
+                del pending[name]
+                progress = True
+
+                current = fingerprint(stage, stages)
+                if (
+                    not force
+                    and state.get(name) == current
+                    and all(f.exists() for f in stage.outputs)
+                ):
+                    logger.info(f"{name}: up to date, skipped")
+                    status[name] = "skipped"
+                    continue
+
+                logger.info(f"{name}: running")
+                kwargs = dict(stage.params)
+                if stage.depends_on:
+                    kwargs["upstream"] = {
+                        dep: results.get(dep) for dep in stage.depends_on
+                    }
+                running[pool.submit(stage.run, **kwargs)] = (name, current)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        submit_ready(pool)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, current = running.pop(future)
+                results[name] = future.result()
+                status[name] = "ran"
+                state[name] = current
+                state_file.write_text(json.dumps(state, indent=2))
+                logger.info(f"{name}: done")
+            submit_ready(pool)
+
+    if pending:
+        raise RuntimeError(f"Stages could not be scheduled: {set(pending)}")
+
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--max-workers", type=int)
+    parser.add_argument("--target", action="append", help="Stage to run (repeatable)")
+    args = parser.parse_args()
+
+    configure_logging()
+    run_pipeline(force=args.force, max_workers=args.max_workers, targets=args.target)
@@ -0,0 +1,98 @@
+"""Concurrent fetching of the source data used by the analysis.
+
+The ODA/GNI queries, the WEO tables and the DAC1 contributions do not depend on
+each other, so they are loaded at the same time in a thread pool. The ODA and WEO
+loads warm oda_cache and weo_cache, which the analysis then reads from. The DAC1
+contributions are returned so they can be passed to eu_own_resources_constant_eur.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from scripts import common
+from scripts.eu_institutions import download_eu_x_eui, get_eui_total_oda
+from scripts.horizon import max_data_year
+from scripts.instrumentation import instrument
+from scripts.ms_analysis import get_total_oda_and_gni
+from scripts.tools import get_constant_deflators, get_gdp_growth_factor
+
+
+def _member_state_loads(start_year: int, base_year: int, end_year: int) -> dict:
+    return {
+        "ms_oda": (
+            get_total_oda_and_gni,
+            {"years": list(range(start_year, end_year + 1)), "currency": "EUR"},
+        ),
+        "ms_deflators": (get_constant_deflators, {"base": base_year}),
+        "growth_factors": (get_gdp_growth_factor, {"from_year": end_year}),
+    }
+
+
+def _eu_institutions_loads(end_year: int) -> dict:
+    return {
+        "eui_oda": (
+            get_eui_total_oda,
+            {"start_year": 2014, "end_year": end_year, "currency": "USD"},
+        ),
+        "eu28_deflators": (
+            get_constant_deflators,
+            {"base": 2025, "eu_list": common.EU28},
+        ),
+        "eu27_deflators": (
+            get_constant_deflators,
+            {"base": 2025, "eu_list": common.EU27},
+        ),
+        "eu28_contributions": (
+            download_eu_x_eui,
+            {"x": common.EU28, "start_year": 2014, "end_year": 2020},
+        ),
+        "eu27_contributions": (
+            download_eu_x_eui,
+            {"x": common.EU27, "start_year": 2021, "end_year": end_year},
+        ),
+    }
+
+
+@instrument
+def prefetch(
+    member_states: bool = True,
+    eu_institutions: bool = True,
+    start_year: int = 2014,
+    base_year: int = 2025,
+    max_workers: int | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Fetch the source data for the Member States and/or the EU Institutions
+    analysis concurrently.
+
+    Args:
+        member_states (bool): Fetch the ODA/GNI history, WEO deflators and GDP
+            growth factors used by ms_analysis.
+        eu_institutions (bool): Fetch the EU Institutions ODA, the EU27/EU28 WEO
+            deflators and the DAC1 contributions used by eu_institutions.
+        start_year (int): First year of the Member States data.
+        base_year (int): Base year of the Member States constant prices.
+        max_workers (int | None): Number of concurrent loads. Loads run one after
+            the other if 1.
+
+    Returns:
+        dict[str, pd.DataFrame]: The fetched data, by name. "eu28_contributions"
+        and "eu27_contributions" are the arguments of eu_own_resources_constant_eur.
+    """
+    # The latest data year is needed to build the queries, so it is detected first
+    end_year = max_data_year()
+
+    loads = {}
+    if member_states:
+        loads.update(_member_state_loads(start_year, base_year, end_year))
+    if eu_institutions:
+        loads.update(_eu_institutions_loads(end_year))
+
+    if max_workers == 1:
+        return {name: func(**kwargs) for name, (func, kwargs) in loads.items()}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            name: pool.submit(func, **kwargs) for name, (func, kwargs) in loads.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
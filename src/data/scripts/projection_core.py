@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import instrument
+from scripts.targets import target_array
+from scripts.tools import add_member_state_names, extend_deflators_to_year
+
+
+def _to_matrix(
+    df: pd.DataFrame,
+    value: str,
+    donors: np.ndarray,
+    years: np.ndarray,
+    donor_column: str = "donor_code",
+) -> np.ndarray:
+    """Lay out a long (donor, year, value) table as a dense (donor x year) array."""
+    return (
+        df.pivot(index=donor_column, columns="year", values=value)
+        .reindex(index=donors, columns=years)
+        .to_numpy(dtype="float64", na_value=np.nan)
+    )
+
+
+@instrument
+def project_arrays(
+    inputs: dict,
+    start_year: int,
+    end_year: int,
+    base_year: int,
+    target_year: int,
+    rolling_window: int,
+    max_data_year: int,
+    targets: dict[int, float] | None = None,
+) -> dict:
+    """Compute the member-state projections as dense (donor x year) arrays.
+
+    Args:
+        inputs (dict): Prefetched inputs (see ms_analysis.fetch_projection_inputs).
+        start_year (int): First year of the data.
+        end_year (int): Last year of the projections.
+        base_year (int): Base year for constant prices.
+        target_year (int): Year by which the targets are met, after max_data_year.
+        rolling_window (int): Years used for the average growth after the WEO horizon.
+        max_data_year (int): Latest year with ODA data.
+        targets (dict[int, float] | None): ODA/GNI target of each donor (see
+            scripts.targets). The default targets if None.
+
+    Returns:
+        dict: The donors and years axes, and the gni, oda_gni_ratio, oda and target
+        arrays (in constant prices).
+    """
+    if target_year <= max_data_year:
+        raise ValueError(
+            f"The target year ({target_year}) must be after the latest year with "
+            f"data ({max_data_year})"
+        )
+
+    spending = inputs["spending"].loc[lambda d: d.year >= start_year]
+
+    donors = spending.donor_code.unique()
+    years = np.arange(start_year, end_year + 1)
+
+    gni = _to_matrix(spending, "gni", donors, years)
+    ratio = _to_matrix(spending, "oda_gni_ratio", donors, years)
+    factor = _to_matrix(inputs["factors"][base_year], "factor", donors, years)
+
+    target = target_array(donors, targets)
+
+    # Path to the target: the latest ratio is kept if it is already at (or above)
+    # the target, otherwise the target is reached by the target year.
+    if target_year <= end_year and start_year <= max_data_year:
+        latest = ratio[:, years == max_data_year][:, 0]
+        ratio[:, years == target_year] = np.where(
+            latest >= target, latest, np.where(latest < target, target, np.nan)
+        )[:, None]
+
+    ratio = pd.DataFrame(ratio.T).interpolate(method="linear").to_numpy().T
+
+    # Historical GNI in constant prices
+    gni = gni * factor
+
+    # Projected GNI, growing the latest constant GNI with the WEO growth factors
+    latest_year = spending.year.max()
+    growth = (
+        inputs["growth_factors"]
+        .pipe(extend_deflators_to_year, end_year, rolling_window=rolling_window)
+        .loc[lambda d: d.year > latest_year]
+        .astype({"value": "float64"})
+    )
+    growth = _to_matrix(growth, "value", donors, years, donor_column="dac_code")
+
+    projected = years > latest_year
+    gni[:, projected] = gni[:, years == latest_year] * growth[:, projected]
+
+    return {
+        "donors": donors,
+        "years": years,
+        "gni": gni,
+        "oda_gni_ratio": ratio,
+        "oda": ratio * gni,
+        "target": target[:, None] * gni,
+    }
+
+
+@instrument
+def arrays_to_chart(arrays: dict, total_name: str = "EU27 Countries") -> pd.DataFrame:
+    """Convert the projection arrays to the chart DataFrame, with the totals (named
+    total_name) first and then each Member State, sorted by name and year. Rounding
+    and the missing-to-target column are left to clean_data_for_viz."""
+    donors, years = arrays["donors"], arrays["years"]
+
+    oda_total = np.nansum(arrays["oda"], axis=0)
+    target_total = np.nansum(arrays["target"], axis=0)
+    gni_total = np.nansum(arrays["gni"], axis=0)
+
+    totals = pd.DataFrame(
+        {
+            "Year": years,
+            "ODA": oda_total,
+            "Target": target_total,
+            "Member State": total_name,
+            "ODA/GNI ratio": 100 * oda_total / gni_total,
+        }
+    )
+
+    names = add_member_state_names(pd.DataFrame({"donor_code": donors}))[
+        "Member State"
+    ].to_numpy()
+    order = pd.DataFrame({"name": names}).sort_values("name").index.to_numpy()
+
+    members = pd.DataFrame(
+        {
+            "Year": np.tile(years, len(donors)),
+            "ODA": arrays["oda"][order].ravel(),
+            "Target": arrays["target"][order].ravel(),
+            "Member State": np.repeat(names[order], len(years)),
+            "ODA/GNI ratio": 100 * arrays["oda_gni_ratio"][order].ravel(),
+        }
+    )
+
+    return pd.concat([totals, members], ignore_index=True)
@@ -0,0 +1,114 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from scripts.instrumentation import instrument
+from scripts.ms_analysis import (
+    fetch_projection_inputs,
+    main_column_chart_with_projections,
+)
+
+SCENARIO_PARAMETERS = ("target_year", "base_year", "rolling_window", "end_year")
+
+DEFAULT_SCENARIO = {
+    "target_year": 2030,
+    "base_year": 2025,
+    "rolling_window": 3,
+    "end_year": 2034,
+}
+
+# Inputs shared by all the scenarios evaluated in a worker process
+_worker_inputs: dict | None = None
+
+
+def _init_worker(inputs: dict) -> None:
+    global _worker_inputs
+    _worker_inputs = inputs
+
+
+def _run_scenario(start_year: int, engine: str, scenario: dict) -> pd.DataFrame:
+    return main_column_chart_with_projections(
+        start_year=start_year, inputs=_worker_inputs, engine=engine, **scenario
+    )
+
+
+def scenario_grid(grid: dict[str, list]) -> list[dict]:
+    """Expands a parameter grid into a list of scenarios. Parameters missing from
+    the grid take the default value.
+
+    Args:
+        grid (dict[str, list]): Values to try for each parameter.
+
+    Returns:
+        list[dict]: One dictionary of parameters per scenario.
+    """
+    unknown = set(grid) - set(SCENARIO_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown scenario parameters: {unknown}")
+
+    grid = {**{k: [v] for k, v in DEFAULT_SCENARIO.items()}, **grid}
+
+    return [
+        dict(zip(SCENARIO_PARAMETERS, values))
+        for values in itertools.product(*(grid[k] for k in SCENARIO_PARAMETERS))
+    ]
+
+
+@instrument
+def scenario_sweep(
+    grid: dict[str, list],
+    start_year: int = 2014,
+    max_workers: int | None = None,
+    inputs: dict | None = None,
+    engine: str = "pandas",
+) -> pd.DataFrame:
+    """Runs main_column_chart_with_projections for every combination of parameters
+    in the grid.
+
+    The source data (ODA/GNI history, conversion factors for every base year and
+    GDP growth factors) is fetched once and shared by all scenarios, which are
+    then evaluated in a process pool.
+
+    Args:
+        grid (dict[str, list]): Values to try for target_year, base_year,
+            rolling_window and/or end_year.
+        start_year (int): First year of the data.
+        max_workers (int | None): Number of worker processes. Scenarios run in the
+            current process if 1.
+        inputs (dict | None): Prefetched inputs (see fetch_projection_inputs).
+        engine (str): "pandas" or "numpy" (see main_column_chart_with_projections).
+
+    Returns:
+        pd.DataFrame: Long-format DataFrame of every scenario's chart data, indexed
+        by the scenario parameters.
+    """
+    scenarios = scenario_grid(grid)
+
+    if inputs is None:
+        inputs = fetch_projection_inputs(
+            start_year=start_year,
+            base_years=sorted({s["base_year"] for s in scenarios}),
+        )
+
+    if max_workers == 1:
+        _init_worker(inputs)
+        results = [_run_scenario(start_year, engine, s) for s in scenarios]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(inputs,)
+        ) as pool:
+            results = list(
+                pool.map(
+                    _run_scenario,
+                    itertools.repeat(start_year),
+                    itertools.repeat(engine),
+                    scenarios,
+                    chunksize=4,
+                )
+            )
+
+    return pd.concat(
+        [df.assign(**scenario) for scenario, df in zip(scenarios, results)],
+        ignore_index=True,
+    ).set_index(list(SCENARIO_PARAMETERS))
@@ -0,0 +1,365 @@
+"""Local HTTP service for interactive chart scenarios.
+
+The source data is fetched once and held in memory. Each request is computed with
+the vectorized projection (projection_core) and cached in an LRU keyed on the
+normalised query, so repeated and revisited scenarios are served from memory.
+Responses carry an ETag, and a request whose If-None-Match matches gets an empty
+304 response.
+
+Endpoints (all parameters are optional). The target year must be after the latest
+data year and at most the end year, and the base year between the start year and the
+WEO horizon; other years get a 400 response:
+
+    /chart?target_year=2030&base_year=2025&members=France,Germany&format=csv
+        The main column chart data. With members, the totals are over the selected
+        Member States.
+    /mff?target_year=2030&base_year=2025&members=France,Germany&window=2028-2034
+        ODA over the MFF window for each selected Member State and their total,
+        and the imputable and non-imputable EU Institutions ODA.
+
+Run from src/data (--fixtures serves the offline fixture data):
+
+    python -m scripts.service --port 8000
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from scripts.eu_institutions import (
+    eu_own_resources_constant_eur,
+    eui_mff_period,
+    eui_spending_chart,
+)
+from scripts.logger import configure_logging
+from scripts.ms_analysis import clean_data_for_viz, fetch_projection_inputs
+from scripts.outputs import encode
+from scripts.projection_core import arrays_to_chart, project_arrays
+from scripts.tools import add_member_state_names, conversion_factors
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {"json": "application/json", "csv": "text/csv"}
+
+
+class ResultCache:
+    """Thread-safe LRU cache of computed results."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._memory: OrderedDict[tuple, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], object]) -> object:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        value = compute()
+
+        with self._lock:
+            self._memory[key] = value
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+        return value
+
+
+class BadRequest(ValueError):
+    """Invalid query parameters."""
+
+
+def _int(query: dict, name: str, default: int, first: int, last: int) -> int:
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise BadRequest(f"{name} must be a year")
+    if not first <= value <= last:
+        raise BadRequest(f"{name} must be between {first} and {last}")
+    return value
+
+
+def _window(
+    query: dict, default: tuple[int, int], first: int, last: int
+) -> tuple[int, int]:
+    if "window" not in query:
+        return default
+    try:
+        start, end = (int(y) for y in query["window"][0].split("-"))
+    except ValueError:
+        raise BadRequest("window must be start-end, e.g. 2028-2034")
+    if not first <= start <= end <= last:
+        raise BadRequest(f"window must be within {first}-{last}")
+    return start, end
+
+
+class ScenarioService:
+    """Chart scenarios computed from source data held in memory.
+
+    Args:
+        inputs (dict | None): Prefetched inputs (see fetch_projection_inputs).
+            Conversion factors for other base years are computed when first needed,
+            and kept in an LRU cache of cache_size entries.
+        own_resources (pd.DataFrame | None): EU Institutions own resources (see
+            eu_own_resources_constant_eur). Fetched when first needed.
+        start_year (int): First year of the data.
+        end_year (int): Last year of the projections.
+        rolling_window (int): Years used for the average growth after the WEO horizon.
+        cache_size (int): Number of responses, projections and conversion factor
+            tables kept in the LRU caches.
+    """
+
+    def __init__(
+        self,
+        inputs: dict | None = None,
+        own_resources: pd.DataFrame | None = None,
+        start_year: int = 2014,
+        end_year: int = 2034,
+        rolling_window: int = 3,
+        cache_size: int = 256,
+    ):
+        if inputs is None:
+            inputs = fetch_projection_inputs(start_year=start_year)
+        self.inputs = inputs
+        self.own_resources = own_resources
+        self.start_year = start_year
+        self.end_year = end_year
+        self.rolling_window = rolling_window
+        self.responses = ResultCache(cache_size)
+        self.projections = ResultCache(cache_size)
+        self.factors = ResultCache(cache_size)
+        for base_year, factors in inputs["factors"].items():
+            self.factors.get_or_compute((base_year,), lambda: factors)
+        self._lock = threading.Lock()
+
+        # Targets are set after the data, and constant prices need WEO deflators
+        self.max_data_year = int(inputs["spending"].year.max())
+        self.max_base_year = int(inputs["growth_factors"].year.max())
+
+        spending = self.inputs["spending"]
+        names = add_member_state_names(
+            pd.DataFrame({"donor_code": spending.donor_code.unique()})
+        )
+        self.members = dict(zip(names["Member State"], names["donor_code"]))
+
+    def _factors(self, base_year: int) -> pd.DataFrame:
+        return self.factors.get_or_compute(
+            (base_year,),
+            lambda: conversion_factors(self.inputs["spending"], base_year=base_year),
+        )
+
+    def _own_resources(self) -> pd.DataFrame:
+        with self._lock:
+            if self.own_resources is None:
+                self.own_resources = eu_own_resources_constant_eur()
+            return self.own_resources
+
+    def projection(self, target_year: int, base_year: int) -> dict:
+        """Projection arrays for every Member State, cached per scenario."""
+
+        def compute() -> dict:
+            return project_arrays(
+                inputs={
+                    **self.inputs,
+                    "factors": {base_year: self._factors(base_year)},
+                },
+                start_year=self.start_year,
+                end_year=self.end_year,
+                base_year=base_year,
+                target_year=target_year,
+                rolling_window=self.rolling_window,
+                max_data_year=self.max_data_year,
+            )
+
+        return self.projections.get_or_compute((target_year, base_year), compute)
+
+    def _members(self, query: dict) -> tuple[str, ...] | None:
+        if "members" not in query:
+            return None
+        members = tuple(
+            sorted({m.strip() for m in query["members"][0].split(",") if m.strip()})
+        )
+        unknown = set(members) - set(self.members)
+        if unknown or not members:
+            raise BadRequest(f"Unknown Member States: {sorted(unknown)}")
+        return members
+
+    def chart(
+        self,
+        target_year: int = 2030,
+        base_year: int = 2025,
+        members: tuple[str, ...] | None = None,
+    ) -> pd.DataFrame:
+        """The main column chart data, for all or some Member States.
+
+        Returns:
+            pd.DataFrame: The same columns as main_column_chart_with_projections.
+            With members, the totals are named "Selected Member States".
+        """
+        arrays = self.projection(target_year, base_year)
+        if members is None:
+            return arrays_to_chart(arrays).pipe(clean_data_for_viz)
+
+        keep = np.isin(arrays["donors"], [self.members[m] for m in members])
+        subset = {
+            key: value[keep] if key != "years" else value
+            for key, value in arrays.items()
+        }
+        return arrays_to_chart(subset, total_name="Selected Member States").pipe(
+            clean_data_for_viz
+        )
+
+    def mff(
+        self,
+        target_year: int = 2030,
+        base_year: int = 2025,
+        members: tuple[str, ...] | None = None,
+        window: tuple[int, int] = (2028, 2034),
+    ) -> dict:
+        """ODA over the MFF window for each selected Member State and their total,
+        and the EU Institutions ODA (based on the EU27 totals)."""
+        start, end = window
+        eu27 = self.chart(target_year, base_year)
+        selected = (
+            eu27 if members is None else self.chart(target_year, base_year, members)
+        )
+
+        totals = (
+            selected.loc[lambda d: d.Year.between(start, end)]
+            .groupby("Member State", sort=False)["ODA"]
+            .sum()
+        )
+        imputable, non_imputable = eui_mff_period(
+            eu27,
+            eui_spending_chart(eu27, own_resources=self._own_resources()),
+            start_year=start,
+            end_year=end,
+        )
+
+        return {
+            "window": [start, end],
+            "ODA": {name: float(value) for name, value in totals.items()},
+            "EU Institutions": {
+                "Imputable": float(imputable),
+                "Non-imputable": float(non_imputable),
+            },
+        }
+
+    def _respond(self, endpoint: str, query: dict) -> tuple[bytes, str, str]:
+        target_year = _int(
+            query, "target_year", 2030, self.max_data_year + 1, self.end_year
+        )
+        base_year = _int(query, "base_year", 2025, self.start_year, self.max_base_year)
+        members = self._members(query)
+
+        if endpoint == "/chart":
+            fmt = query.get("format", ["json"])[0]
+            if fmt not in CONTENT_TYPES:
+                raise BadRequest("format must be json or csv")
+            key = (endpoint, target_year, base_year, members, fmt)
+
+            def compute() -> bytes:
+                df = self.chart(target_year, base_year, members)
+                return encode(df, (fmt,))[fmt]
+
+        else:
+            fmt = "json"
+            window = _window(query, (2028, 2034), self.start_year, self.end_year)
+            key = (endpoint, target_year, base_year, members, window)
+
+            def compute() -> bytes:
+                result = self.mff(target_year, base_year, members, window)
+                return json.dumps(result).encode()
+
+        def response() -> tuple[bytes, str, str]:
+            body = compute()
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            return body, etag, CONTENT_TYPES[fmt]
+
+        return self.responses.get_or_compute(key, response)
+
+    def handle(
+        self, url: str, if_none_match: str | None = None
+    ) -> tuple[int, dict, bytes]:
+        """Handle a GET request.
+
+        Args:
+            url (str): Path and query string.
+            if_none_match (str | None): Value of the If-None-Match header.
+
+        Returns:
+            tuple[int, dict, bytes]: Status code, headers and body.
+        """
+        parts = urlsplit(url)
+        if parts.path not in ("/chart", "/mff"):
+            return 404, {"Content-Type": "text/plain"}, b"Not found"
+
+        try:
+            body, etag, content_type = self._respond(parts.path, parse_qs(parts.query))
+        except BadRequest as error:
+            return 400, {"Content-Type": "text/plain"}, str(error).encode()
+        except Exception:
+            logger.exception(f"Error handling {url}")
+            return 500, {"Content-Type": "text/plain"}, b"Internal server error"
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match == etag:
+            return 304, headers, b""
+
+        return 200, {**headers, "Content-Type": content_type}, body
+
+
+def make_server(
+    service: ScenarioService, host: str = "127.0.0.1", port: int = 8000
+) -> ThreadingHTTPServer:
+    """An HTTP server for the service. Call serve_forever() to start it."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            status, headers, body = service.handle(
+                self.path, self.headers.get("If-None-Match")
+            )
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            logger.debug(format % args)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fixtures", action="store_true", help="Serve fixture data")
+    args = parser.parse_args()
+
+    configure_logging(logging.INFO)
+    if args.fixtures:
+        from scripts.fixtures import Fixtures, use_fixtures
+
+        data = use_fixtures(Fixtures())
+    else:
+        data = nullcontext()
+
+    with data:
+        server = make_server(ScenarioService(), args.host, args.port)
+        logger.info(f"Serving scenarios on http://{args.host}:{args.port}")
+        server.serve_forever()
@@ -0,0 +1,100 @@
+"""Thin wrappers around the external data packages (bblocks, oda_data, oda_reader
+and pydeflate).
+
+The packages are only imported the first time one of these functions is called,
+and the data paths are set once at that point. Importing the analysis modules
+therefore does not load any of them.
+"""
+
+from functools import cache
+
+import pandas as pd
+
+from scripts.config import Paths
+from scripts.deflator_index import DeflatorIndex
+
+
+@cache
+def init_data_paths() -> None:
+    """Point bblocks, pydeflate and oda_data to the raw_data folder. Runs once."""
+    from bblocks import set_bblocks_data_path
+    from oda_data import set_data_path
+    from pydeflate import set_pydeflate_path
+
+    set_bblocks_data_path(Paths.raw_data)
+    set_pydeflate_path(Paths.raw_data)
+    set_data_path(Paths.raw_data)
+
+
+@cache
+def donor_groupings() -> dict:
+    """oda_data donor groupings, loaded once."""
+    from oda_data import donor_groupings as _donor_groupings
+
+    return _donor_groupings()
+
+
+def world_economic_outlook(year: int, release: int):
+    """A bblocks WorldEconomicOutlook object for the given vintage."""
+    init_data_paths()
+    from bblocks import WorldEconomicOutlook
+
+    return WorldEconomicOutlook(year=year, release=release)
+
+
+def convert_id(series: pd.Series, *args, **kwargs) -> pd.Series:
+    """bblocks.convert_id"""
+    init_data_paths()
+    from bblocks import convert_id as _convert_id
+
+    return _convert_id(series, *args, **kwargs)
+
+
+def add_short_names_column(df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """bblocks.add_short_names_column"""
+    init_data_paths()
+    from bblocks import add_short_names_column as _add_short_names_column
+
+    return _add_short_names_column(df=df, **kwargs)
+
+
+def deflate(df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """pydeflate.deflate"""
+    init_data_paths()
+    from pydeflate import deflate as _deflate
+
+    return _deflate(df=df, **kwargs)
+
+
+@cache
+def pydeflate_dac1() -> DeflatorIndex:
+    """The pydeflate DAC1 deflators and exchange rates, memory-mapped and indexed
+    once. The file is downloaded by pydeflate if it is missing."""
+    path = Paths.raw_data / "pydeflate_dac1.feather"
+    if not path.exists():
+        init_data_paths()
+        from pydeflate.get_data.oecd_data import update_dac1
+
+        update_dac1()
+
+    return DeflatorIndex(path)
+
+
+def oda_data(
+    years: list[int], donors: list[int], indicators: list[str], currency: str
+) -> pd.DataFrame:
+    """Load indicators with oda_data.ODAData and return them in long format."""
+    init_data_paths()
+    from oda_data import ODAData
+
+    oda = ODAData(years=years, donors=donors, currency=currency)
+    oda.load_indicator(indicators)
+    return oda.get_data()
+
+
+def download_dac1(start_year: int, end_year: int, filters: dict) -> pd.DataFrame:
+    """oda_reader.download_dac1"""
+    init_data_paths()
+    from oda_reader import download_dac1 as _download_dac1
+
+    return _download_dac1(start_year=start_year, end_year=end_year, filters=filters)
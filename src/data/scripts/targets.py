@@ -0,0 +1,71 @@
+"""ODA/GNI targets by donor.
+
+A table maps donors (DAC codes, or names as in src/data/targets.json) to their
+target. Donors missing from the table get the 0.7% target. Without a table, the
+targets are read from src/data/targets.json, which the site also shows.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from scripts import sources
+from scripts.common import TARGET
+from scripts.config import Paths
+
+TARGETS_FILE = Paths.app_data / "targets.json"
+
+# Targets read from each file, with the modification time and size they were read at
+_TARGETS: dict[Path, tuple[int, int, dict[int, float]]] = {}
+
+
+def default_targets(path: Path = TARGETS_FILE) -> dict[int, float]:
+    """The targets of TARGETS_FILE, keyed on DAC code. The file is only read (and
+    its donor names converted) again when its modification time or size changes."""
+    stat = path.stat()
+    cached = _TARGETS.get(path)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        cached = _TARGETS[path] = (stat.st_mtime_ns, stat.st_size, read_targets(path))
+    return dict(cached[2])
+
+
+def read_targets(path: Path = TARGETS_FILE) -> dict[int, float]:
+    """Read a {donor: target} JSON table. Donors can be DAC codes or names, which
+    are converted to DAC codes.
+
+    Returns:
+        dict[int, float]: Target of each donor, keyed on DAC code.
+    """
+    table = json.loads(path.read_text())
+
+    donors = pd.Series(list(table.keys()), dtype="object")
+    names = ~donors.str.fullmatch(r"\d+")
+    codes = donors.copy()
+    if names.any():
+        codes[names] = sources.convert_id(
+            donors[names], "regex", "DACCode", not_found=pd.NA
+        )
+
+    unknown = donors[codes.isna()].tolist()
+    if unknown:
+        raise ValueError(f"Unknown donors in {path.name}: {unknown}")
+
+    return {int(code): float(target) for code, target in zip(codes, table.values())}
+
+
+def target_array(
+    donor_codes: Iterable[int], targets: dict[int, float] | None = None
+) -> np.ndarray:
+    """Target of each donor, from the table (the default targets if None)."""
+    if targets is None:
+        targets = default_targets()
+
+    keys = pd.Index(list(targets), dtype="int64")
+    values = np.append(np.fromiter(targets.values(), dtype="float64"), TARGET)
+
+    # Donors missing from the table point to the last value: the 0.7% target
+    position = keys.get_indexer(np.asarray(donor_codes, dtype="int64"))
+    return values[np.where(position >= 0, position, len(keys))]
@@ -1,48 +1,45 @@
+import numpy as np
 import pandas as pd
-from bblocks import (
-    WorldEconomicOutlook,
-    set_bblocks_data_path,
-    convert_id,
-    add_short_names_column,
-)
-from oda_data import donor_groupings
 
-from scripts import config
-
-from pydeflate import deflate, set_pydeflate_path
-
-set_bblocks_data_path(config.Paths.raw_data)
-set_pydeflate_path(config.Paths.raw_data)
-
-eu27 = list(donor_groupings()["eu27_countries"].keys())
-eu28 = eu27 + [12]
+from scripts import common, sources
+from scripts.cache import cached_table
+from scripts.common import WEO_DEFLATORS_VINTAGE, WEO_GROWTH_VINTAGE
+from scripts.deflator_index import KeyIndex
+from scripts.groups import DonorGroups
+from scripts.horizon import max_data_year
+from scripts.instrumentation import instrument
 
 
 def rebase_value(data: pd.DataFrame, year: int) -> pd.DataFrame:
+    # Each donor's value in the base year, spread over its rows in one pass
+    base = data["value"].where(data.year.dt.year == year)
     return data.assign(
-        value=lambda d: d.groupby("dac_code")["value"].transform(
-            lambda x: x / x.loc[d.year.dt.year == year].sum()
-        )
+        value=data["value"] / base.groupby(data["dac_code"]).transform("sum")
     )
 
 
+@instrument
 def add_dac_codes(data: pd.DataFrame) -> pd.DataFrame:
-    data["dac_code"] = convert_id(
-        data["iso_code"],
-        "ISO3",
-        "DACCode",
-        not_found=pd.NA,
-        additional_mapping={"EUI": 918},
-    ).astype("Int32")
-    return data
+    return data.assign(
+        dac_code=sources.convert_id(
+            data["iso_code"],
+            "ISO3",
+            "DACCode",
+            not_found=pd.NA,
+            additional_mapping={"EUI": 918},
+        ).astype("Int32")
+    )
 
 
+@instrument
+@cached_table("constant_deflators", vintage=WEO_DEFLATORS_VINTAGE)
 def get_constant_deflators(
     base: int = 2022, eu_list: list | None = None
 ) -> pd.DataFrame:
     if eu_list is None:
-        eu_list = eu27
-    weo = WorldEconomicOutlook(year=2024, release=2)
+        eu_list = common.EU27
+    weo_year, weo_release = WEO_DEFLATORS_VINTAGE
+    weo = sources.world_economic_outlook(year=weo_year, release=weo_release)
 
     weo.load_data(["NGDP_D", "NGDPD"])
 
@@ -64,9 +61,8 @@ def get_constant_deflators(
     eu["NGDPD_C"] = eu["NGDPD"] / (eu["NGDP_D"] / 100)
 
     eu = (
-        eu.groupby(["year"], dropna=False, observed=True)[["NGDPD", "NGDPD_C"]]
-        .sum()
-        .reset_index()
+        DonorGroups({"EUI": eu_list + [918]})
+        .sum(eu, ["NGDPD", "NGDPD_C"], by="year", donor_column="dac_code")
         .assign(iso_code="EUI", dac_code=918, donor_code=918, indicator="NGDP_D")
         .assign(value=lambda d: 100 * d.NGDPD / d.NGDPD_C)
         .filter(["iso_code", "dac_code", "year", "indicator", "value"])
@@ -79,9 +75,36 @@ def get_constant_deflators(
     return df.filter(["dac_code", "iso_code", "year", "value"])
 
 
-def get_gdp_growth_factor(from_year: int):
+@instrument
+@cached_table("gdp_deflators", vintage=WEO_DEFLATORS_VINTAGE)
+def get_gdp_deflators(base: int, donors: list | None = None) -> pd.DataFrame:
+    """WEO GDP deflators (NGDP_D, prices only) of each donor, rebased to 1 in the
+    base year."""
+    if donors is None:
+        donors = common.EU27
+    weo_year, weo_release = WEO_DEFLATORS_VINTAGE
+    weo = sources.world_economic_outlook(year=weo_year, release=weo_release)
 
-    weo = WorldEconomicOutlook(year=2024, release=1)
+    weo.load_data(["NGDP_D"])
+
+    df = (
+        weo.get_data("NGDP_D")
+        .pipe(add_dac_codes)
+        .loc[lambda d: d.dac_code.isin(list(donors))]
+        .pipe(rebase_value, year=base)
+    )
+
+    return df.filter(["dac_code", "iso_code", "year", "value"])
+
+
+@instrument
+@cached_table("gdp_growth_factor", vintage=WEO_GROWTH_VINTAGE)
+def get_gdp_growth_factor(from_year: int, donors: list | None = None):
+    if donors is None:
+        donors = common.EU27
+
+    weo_year, weo_release = WEO_GROWTH_VINTAGE
+    weo = sources.world_economic_outlook(year=weo_year, release=weo_release)
 
     weo.load_data(["NGDP_R"])
 
@@ -90,7 +113,7 @@ def get_gdp_growth_factor(from_year: int):
         .sort_values(["iso_code", "year"])
         .assign(year=lambda d: d.year.dt.year)
         .pipe(add_dac_codes)
-        .loc[lambda d: d.dac_code.isin(eu27 + [918])]
+        .loc[lambda d: d.dac_code.isin(list(donors) + [918])]
     )
 
     base_values = df.loc[lambda d: d.year == from_year].filter(
@@ -105,24 +128,38 @@ def get_gdp_growth_factor(from_year: int):
     return df.filter(["dac_code", "dac_code", "iso_code", "year", "value"])
 
 
-def to_constant(
+@instrument
+def conversion_factors(
     df: pd.DataFrame,
     base_year: int = 2025,
     source_currency: str = "EUI",
-    source_column: str = "total_oda_official_definition",
-    target_column: str = "total_oda_official_definition",
     eu_list: list | None = None,
+    deflate_year: int | None = None,
 ) -> pd.DataFrame:
-    if base_year > 2023:
-        deflators = get_constant_deflators(base=base_year, eu_list=eu_list).assign(
-            year=lambda d: d.year.dt.year
-        )
-        deflate_year = 2023
-    else:
-        deflate_year = base_year
+    """Get the factor that converts current values into constant EUR values, for
+    every (donor_code, year) pair in the DataFrame.
+
+    The DAC deflator and exchange rate are resolved once per pair, and rebased with
+    the WEO deflators when the base year is beyond the latest DAC data.
+
+    deflate_year is the base year of the DAC deflators. It defaults to the base year,
+    capped at the latest year with data.
+
+    Returns:
+        pd.DataFrame: DataFrame with donor_code, year and factor columns.
+    """
+    if deflate_year is None:
+        deflate_year = min(base_year, max_data_year())
+
+    factors = (
+        df.filter(["donor_code", "year"])
+        .drop_duplicates()
+        .reset_index(drop=True)
+        .assign(factor=1.0)
+    )
 
-    df = deflate(
-        df=df,
+    factors = sources.deflate(
+        df=factors,
         base_year=deflate_year,
         deflator_source="oecd_dac",
         deflator_method="dac_deflator",
@@ -132,49 +169,120 @@ def to_constant(
         id_column="donor_code",
         id_type="DAC",
         date_column="year",
-        source_column=source_column,
-        target_column=target_column,
-    )
-
-    if "gni" in df.columns:
-
-        df = deflate(
-            df=df,
-            base_year=deflate_year,
-            deflator_source="oecd_dac",
-            deflator_method="dac_deflator",
-            exchange_source="oecd_dac",
-            source_currency="USA" if source_currency == "USD" else source_currency,
-            target_currency="EUI",
-            id_column="donor_code",
-            id_type="DAC",
-            date_column="year",
-            source_column="gni",
-            target_column="gni",
-        )
+        source_column="factor",
+        target_column="factor",
+    )
 
-    if base_year > 2023:
-        df = df.merge(
+    if base_year > deflate_year:
+        deflators = (
+            get_constant_deflators(base=base_year, eu_list=eu_list)
+            .assign(year=lambda d: d.year.dt.year)
+            .filter(["year", "dac_code", "value"])
+        )
+        factors = factors.merge(
             deflators,
             left_on=["year", "donor_code"],
             right_on=["year", "dac_code"],
             how="left",
+        ).assign(factor=lambda d: d.factor / d.value)
+
+    return factors.filter(["donor_code", "year", "factor"])
+
+
+@instrument
+def exchange_rates(
+    years: list[int], source_currency: str = "EUI", target_currency: str = "USA"
+) -> pd.DataFrame:
+    """Get the exchange rate between two currencies for each year, from the OECD DAC
+    rates (as used by conversion_factors). The rates are gathered from the
+    memory-mapped pydeflate DAC1 table, as pydeflate.exchange computes them.
+
+    Returns:
+        pd.DataFrame: DataFrame with year and rate columns.
+    """
+    dac1 = sources.pydeflate_dac1()
+    years = np.asarray(list(years), dtype="int64")
+
+    def usd_rate(currency: str) -> np.ndarray:
+        return dac1.lookup(np.full(len(years), currency), years, column="exchange")
+
+    return pd.DataFrame(
+        {"year": years, "rate": usd_rate(target_currency) / usd_rate(source_currency)}
+    )
+
+
+@instrument
+def to_constant(
+    df: pd.DataFrame,
+    base_year: int = 2025,
+    source_currency: str = "EUI",
+    source_column: str | list[str] = "total_oda_official_definition",
+    target_column: str | list[str] | None = None,
+    eu_list: list | None = None,
+    factors: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    """Convert one or more value columns to constant EUR prices.
+
+    The conversion factor is resolved once per (donor_code, year) and applied to
+    every column in a single multiplication. A "gni" column, if present, is always
+    converted as well.
+
+    Args:
+        df (pd.DataFrame): DataFrame with donor_code and year columns.
+        base_year (int): Base year for constant prices.
+        source_currency (str): Currency of the source values.
+        source_column (str | list[str]): Column(s) to convert.
+        target_column (str | list[str] | None): Column(s) to store the converted
+            values. Defaults to the source column(s).
+        eu_list (list | None): Countries used to build the EU deflator.
+        factors (pd.DataFrame | None): Precomputed conversion_factors for this
+            base year and currency. They are computed if not provided.
+
+    Returns:
+        pd.DataFrame: DataFrame with the converted columns.
+    """
+    source_columns = (
+        [source_column] if isinstance(source_column, str) else list(source_column)
+    )
+    if target_column is None:
+        target_columns = source_columns
+    elif isinstance(target_column, str):
+        target_columns = [target_column]
+    else:
+        target_columns = list(target_column)
+
+    if len(source_columns) != len(target_columns):
+        raise ValueError("source_column and target_column must have the same length")
+
+    if "gni" in df.columns and "gni" not in source_columns:
+        source_columns = source_columns + ["gni"]
+        target_columns = target_columns + ["gni"]
+
+    if factors is None:
+        factors = conversion_factors(
+            df, base_year=base_year, source_currency=source_currency, eu_list=eu_list
         )
 
-        df[target_column] = df[target_column] / df["value"]
+    # Gathered through a (donor_code, year) index rather than merged
+    factor = KeyIndex(factors.donor_code, factors.year).take(
+        factors["factor"].to_numpy(dtype="float64", na_value=np.nan),
+        df["donor_code"],
+        df["year"],
+    )
 
-    if "gni" in df.columns:
-        df = df.assign(gni=lambda d: d.gni / d.value)
+    values = df[source_columns].to_numpy(dtype="float64", na_value=np.nan)
+    converted = pd.DataFrame(
+        values * factor[:, None], index=df.index, columns=target_columns
+    )
 
-    return df.assign(prices="constant", base_year=base_year)
+    return df.assign(**converted, prices="constant", base_year=base_year)
 
 
-def extend_deflators_to_year(
+def _extend_deflators_reference(
     data: pd.DataFrame, last_year: int, rolling_window: int
 ) -> pd.DataFrame:
-    """This function creates rows for each donor for the missing years between the
-    max year in the data and the last year specified in the arguments. The value is
-    rolling average of the previous 3 years"""
+    """Reference (per-group loop) implementation of extend_deflators_to_year. Kept
+    to check the vectorized engine against."""
 
     def fill_with_rolling_average(
         idx, group: pd.DataFrame, rolling_window: int = 3
@@ -209,11 +317,6 @@ def extend_deflators_to_year(
         group = pd.concat([group, new_df], ignore_index=False)
         return group
 
-    try:
-        data = data.assign(year=lambda d: d.year.dt.year)
-    except AttributeError:
-        pass
-
     dfs = []
 
     for group_idx, group_data in data.groupby(
@@ -228,6 +331,95 @@ def extend_deflators_to_year(
     return pd.concat(dfs, ignore_index=True)
 
 
+def _extend_deflators_vectorized(
+    data: pd.DataFrame, last_year: int, rolling_window: int
+) -> pd.DataFrame:
+    """Vectorized implementation of extend_deflators_to_year. All donors are laid
+    out as a (donor x year) array, so the rolling mean, forward fill and cumulative
+    sum run once over every donor instead of once per group."""
+    keys = ["dac_code", "iso_code"]
+
+    grouped = data.groupby(keys, dropna=False, observed=True, sort=True)
+    gid = grouped.ngroup().to_numpy()
+    diff = grouped["value"].diff().to_numpy(dtype="float64", na_value=np.nan)
+    value = data["value"].to_numpy(dtype="float64", na_value=np.nan)
+    year = data["year"].to_numpy(dtype="int64")
+
+    n_groups = grouped.ngroups
+    max_year = np.full(n_groups, np.iinfo("int64").min)
+    np.maximum.at(max_year, gid, year)
+    window_start = max_year - rolling_window
+
+    first_year = window_start.min()
+    years = np.arange(first_year, max(last_year, max_year.max()) + 1)
+
+    # Each donor only "sees" the years from its own window start onwards
+    in_window = year >= window_start[gid]
+    col = year[in_window] - first_year
+    values = np.full((len(years), n_groups), np.nan)
+    diffs = np.full((len(years), n_groups), np.nan)
+    values[col, gid[in_window]] = value[in_window]
+    diffs[col, gid[in_window]] = diff[in_window]
+
+    diffs = pd.DataFrame(diffs).rolling(window=rolling_window).mean().ffill()
+    values = pd.DataFrame(values)
+    values = values.fillna(values.shift(1).ffill() + diffs.shift(1).cumsum())
+
+    # Keep only the new years, after each donor's latest year
+    new_mask = (years[:, None] > max_year[None, :]) & (years[:, None] <= last_year)
+    new_gid, year_idx = np.nonzero(new_mask.T)
+
+    group_keys = grouped.size().index.to_frame(index=False)
+    new_rows = (
+        group_keys.iloc[new_gid]
+        .reset_index(drop=True)
+        .assign(
+            year=years[year_idx],
+            value=values.to_numpy()[year_idx, new_gid],
+        )
+    )
+
+    # Original rows come first within each donor, followed by the new years
+    order = np.lexsort(
+        (
+            np.r_[np.arange(len(data)), np.arange(len(new_rows))],
+            np.r_[np.zeros(len(data)), np.ones(len(new_rows))],
+            np.r_[gid, new_gid],
+        )
+    )
+
+    return (
+        pd.concat([data, new_rows], ignore_index=True)
+        .iloc[order]
+        .reset_index(drop=True)
+    )
+
+
+@instrument
+def extend_deflators_to_year(
+    data: pd.DataFrame, last_year: int, rolling_window: int, method: str = "vectorized"
+) -> pd.DataFrame:
+    """This function creates rows for each donor for the missing years between the
+    max year in the data and the last year specified in the arguments. The value is
+    rolling average of the previous 3 years.
+
+    The "vectorized" method (default) processes all donors in a single pass. The
+    "reference" method loops over each donor group and is kept for validation."""
+
+    try:
+        data = data.assign(year=lambda d: d.year.dt.year)
+    except AttributeError:
+        pass
+
+    if method == "vectorized":
+        return _extend_deflators_vectorized(data, last_year, rolling_window)
+    if method == "reference":
+        return _extend_deflators_reference(data, last_year, rolling_window)
+
+    raise ValueError(f"Unknown method: {method}")
+
+
+@instrument
 def add_member_state_names(df: pd.DataFrame) -> pd.DataFrame:
     """Adds member state short names to the DataFrame.
 
@@ -237,6 +429,6 @@ def add_member_state_names(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame with member state names added.
     """
-    return add_short_names_column(
+    return sources.add_short_names_column(
         df=df, id_column="donor_code", id_type="DACCode", target_column="Member State"
     )
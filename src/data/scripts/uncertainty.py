@@ -0,0 +1,180 @@
+"""Monte Carlo uncertainty on the GNI growth projections.
+
+The deterministic projection (see projection_core.project_arrays) grows each
+Member State's latest GNI with the WEO growth factors. Here every projected year's
+growth gets a random shock, drawn for many paths at once as a
+(draws x donors x years) array. The shocks are normal on the log scale, with a
+standard deviation equal to the donor's historical volatility of real GNI growth.
+The median path therefore matches the deterministic projection.
+
+ODA and the targets scale with GNI (the ODA/GNI path is fixed), so each draw
+multiplies both by the cumulative shock. The draws are processed in chunks, and only
+the MFF period totals are kept, which bounds memory whatever the number of draws.
+"""
+
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import instrument, trace_run
+from scripts.ms_analysis import fetch_projection_inputs
+from scripts.outputs import write_outputs
+from scripts.projection_core import project_arrays
+from scripts.tools import add_member_state_names
+
+
+def growth_volatility(
+    gni: np.ndarray, years: np.ndarray, latest_year: int
+) -> np.ndarray:
+    """Standard deviation of each donor's annual log growth of (constant) GNI, over
+    the historical years. Donors with too little history get the median."""
+    history = gni[:, years <= latest_year]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_growth = np.diff(np.log(history), axis=1)
+    valid = np.isfinite(log_growth).sum(axis=1) >= 2
+
+    volatility = np.full(len(gni), np.nan)
+    volatility[valid] = np.nanstd(log_growth[valid], axis=1, ddof=1)
+    fallback = np.nanmedian(volatility) if valid.any() else 0.0
+
+    return np.where(np.isnan(volatility), fallback, volatility)
+
+
+def _period_totals(
+    oda: np.ndarray, target: np.ndarray, multiplier: np.ndarray
+) -> tuple[np.ndarray, ...]:
+    """ODA and missing-to-target totals over the period for each draw, per donor
+    and for the EU27 as a whole."""
+    oda = oda[None] * multiplier
+    target = target[None] * multiplier
+
+    member_oda = np.nansum(oda, axis=2)
+    member_missing = np.nansum(np.clip(target - oda, 0, None), axis=2)
+
+    eu_oda = np.nansum(oda, axis=1)
+    eu_missing = np.clip(np.nansum(target, axis=1) - eu_oda, 0, None).sum(axis=1)
+
+    return member_oda, member_missing, eu_oda.sum(axis=1), eu_missing
+
+
+@instrument
+def monte_carlo_mff_totals(
+    draws: int = 10_000,
+    seed: int | None = None,
+    chunk_size: int = 1_000,
+    quantiles: tuple[float, ...] = (0.05, 0.5, 0.95),
+    period: tuple[int, int] = (2028, 2034),
+    volatility: float | None = None,
+    start_year: int = 2014,
+    end_year: int = 2034,
+    base_year: int = 2025,
+    target_year: int = 2030,
+    rolling_window: int = 3,
+    inputs: dict | None = None,
+) -> pd.DataFrame:
+    """Distribution of the MFF period ODA and missing-to-target totals, for each
+    Member State and the EU27, under uncertain GNI growth.
+
+    Args:
+        draws (int): Number of growth paths.
+        seed (int | None): Seed for the random number generator. The results do not
+            depend on chunk_size.
+        chunk_size (int): Number of paths held in memory at once.
+        quantiles (tuple[float, ...]): Quantiles to report.
+        period (tuple[int, int]): First and last year of the MFF period.
+        volatility (float | None): Standard deviation of the annual log growth
+            shocks. Estimated per donor from the historical data if None.
+        start_year (int): First year of the data.
+        end_year (int): Last year of the projections.
+        base_year (int): Base year for constant prices.
+        target_year (int): Year by which the targets are met.
+        rolling_window (int): Years used for the average growth after the WEO horizon.
+        inputs (dict | None): Prefetched inputs (see fetch_projection_inputs).
+
+    Returns:
+        pd.DataFrame: One row per Member State (EU27 Countries first) and indicator
+        ("ODA" or "Missing to target"), with the mean and one column per quantile
+        (e.g. "p5", "p50", "p95").
+    """
+    if inputs is None:
+        inputs = fetch_projection_inputs(start_year=start_year, base_years=base_year)
+
+    latest_year = int(inputs["spending"].year.max())
+    arrays = project_arrays(
+        inputs=inputs,
+        start_year=start_year,
+        end_year=end_year,
+        base_year=base_year,
+        target_year=target_year,
+        rolling_window=rolling_window,
+        max_data_year=latest_year,
+    )
+    donors, years = arrays["donors"], arrays["years"]
+
+    if volatility is None:
+        sd = growth_volatility(arrays["gni"], years, latest_year)
+    else:
+        sd = np.full(len(donors), float(volatility))
+
+    in_period = (years >= period[0]) & (years <= period[1])
+    oda = arrays["oda"][:, in_period]
+    target = arrays["target"][:, in_period]
+
+    # Position of each period year in the cumulative shocks (0: no shock yet)
+    shock_index = np.clip(years[in_period] - latest_year, 0, None)
+    horizon = int(shock_index.max()) if len(shock_index) else 0
+
+    rng = np.random.default_rng(seed)
+    results = {"member_oda": [], "member_missing": [], "eu_oda": [], "eu_missing": []}
+
+    for start in range(0, draws, chunk_size):
+        n = min(chunk_size, draws - start)
+        shocks = rng.normal(0.0, sd[None, :, None], size=(n, len(donors), horizon))
+        log_multiplier = np.concatenate(
+            [np.zeros((n, len(donors), 1)), np.cumsum(shocks, axis=2)], axis=2
+        )
+        multiplier = np.exp(log_multiplier[:, :, shock_index])
+
+        for key, value in zip(results, _period_totals(oda, target, multiplier)):
+            results[key].append(value)
+
+    results = {key: np.concatenate(value) for key, value in results.items()}
+
+    names = add_member_state_names(pd.DataFrame({"donor_code": donors}))[
+        "Member State"
+    ].to_numpy()
+    order = np.argsort(names, kind="stable")
+    q = np.asarray(quantiles)
+    columns = [f"p{100 * x:g}" for x in quantiles]
+
+    def summary(values: np.ndarray, member: np.ndarray, indicator: str):
+        # values: draws x members
+        return pd.DataFrame(
+            {
+                "Member State": member,
+                "indicator": indicator,
+                "mean": values.mean(axis=0),
+                **dict(zip(columns, np.quantile(values, q, axis=0))),
+            }
+        )
+
+    eu = np.array(["EU27 Countries"])
+    return pd.concat(
+        [
+            summary(results["eu_oda"][:, None], eu, "ODA"),
+            summary(results["eu_missing"][:, None], eu, "Missing to target"),
+            summary(results["member_oda"][:, order], names[order], "ODA"),
+            summary(
+                results["member_missing"][:, order], names[order], "Missing to target"
+            ),
+        ],
+        ignore_index=True,
+    )
+
+
+if __name__ == "__main__":
+    from scripts.logger import configure_logging
+
+    configure_logging()
+    with trace_run("uncertainty"):
+        bands = monte_carlo_mff_totals(seed=0)
+        write_outputs(bands, "mff_uncertainty", formats=("csv",))
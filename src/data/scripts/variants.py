@@ -0,0 +1,152 @@
+"""The Member States chart in several currencies and price bases from one run.
+
+The source data is fetched once and the projections are computed once, in current
+EUR (see projection_core.project_arrays, with conversion factors of 1). The
+projected years are then at the prices of the latest data year. Every variant is a
+multiplier on those arrays, stacked as a (variant x donor x year) array:
+
+- constant EUR: the conversion factors of the base year. Projected years keep the
+  factor of the latest data year, as in project_arrays.
+- current EUR: 1, and the projected years are inflated from the latest data year
+  with the WEO GDP deflators (NGDP_D: prices only, as the projections already grow
+  with real GDP), extended past the WEO horizon like the growth factors.
+- USD: the EUR variant times the EUR/USD exchange rate of each year (current
+  prices) or of the base year (constant prices). Years past the latest data year
+  use the latest rate.
+"""
+
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import instrument, trace_run
+from scripts.ms_analysis import clean_data_for_viz, fetch_projection_inputs
+from scripts.outputs import write_outputs
+from scripts.projection_core import _to_matrix, arrays_to_chart, project_arrays
+from scripts.tools import (
+    exchange_rates,
+    extend_deflators_to_year,
+    get_gdp_deflators,
+)
+
+VARIANTS = (
+    ("EUR", "constant", 2025),
+    ("EUR", "current", None),
+    ("USD", "constant", 2025),
+    ("USD", "current", None),
+)
+
+
+def _multipliers(
+    variants: tuple[tuple[str, str, int | None], ...],
+    inputs: dict,
+    arrays: dict,
+    rolling_window: int,
+) -> np.ndarray:
+    """Multipliers from the current EUR arrays to each variant, as a
+    (variant x donor x year) array."""
+    donors, years = arrays["donors"], arrays["years"]
+    latest_year = int(inputs["spending"].year.max())
+    projected = years > latest_year
+    latest = years == latest_year
+
+    deflators = (
+        get_gdp_deflators(base=latest_year, donors=[int(d) for d in donors])
+        .pipe(extend_deflators_to_year, years[-1], rolling_window=rolling_window)
+        .astype({"value": "float64"})
+    )
+    deflators = _to_matrix(deflators, "value", donors, years, donor_column="dac_code")
+    current = np.where(projected, deflators / deflators[:, latest], 1.0)
+
+    rates = exchange_rates(years=list(range(years[0], latest_year + 1)))
+    fx = rates.set_index("year")["rate"].reindex(years).ffill().to_numpy()
+
+    multipliers = []
+    for currency, prices, base_year in variants:
+        if currency not in ("EUR", "USD"):
+            raise ValueError(f"Unknown currency: {currency}")
+
+        if prices == "current":
+            multiplier = current * (fx if currency == "USD" else 1.0)
+        elif prices == "constant":
+            factors = _to_matrix(inputs["factors"][base_year], "factor", donors, years)
+            multiplier = np.where(projected, factors[:, latest], factors)
+            if currency == "USD":
+                multiplier = multiplier * fx[years == min(base_year, latest_year)]
+        else:
+            raise ValueError(f"Unknown prices: {prices}")
+
+        multipliers.append(multiplier)
+
+    return np.stack(multipliers)
+
+
+@instrument
+def chart_variants(
+    variants: tuple[tuple[str, str, int | None], ...] = VARIANTS,
+    start_year: int = 2014,
+    end_year: int = 2034,
+    target_year: int = 2030,
+    rolling_window: int = 3,
+    inputs: dict | None = None,
+) -> pd.DataFrame:
+    """The main column chart data for several currencies and price bases.
+
+    Args:
+        variants (tuple): (currency, prices, base_year) of each variant. The
+            currency is "EUR" or "USD", the prices "constant" or "current" (with a
+            base year of None).
+        start_year (int): First year of the data.
+        end_year (int): Last year of the projections.
+        target_year (int): Year by which the targets are met.
+        rolling_window (int): Years used for the average growth after the WEO horizon.
+        inputs (dict | None): Prefetched inputs (see fetch_projection_inputs). They
+            need the conversion factors of the base year of every constant variant.
+
+    Returns:
+        pd.DataFrame: The chart data of main_column_chart_with_projections for every
+        variant, tagged with currency, prices and base_year columns.
+    """
+    if inputs is None:
+        inputs = fetch_projection_inputs(
+            start_year=start_year,
+            base_years=sorted({y for _, p, y in variants if p == "constant"}),
+        )
+
+    # Projections in current EUR: conversion factors of 1, keyed on the latest year
+    latest_year = int(inputs["spending"].year.max())
+    unit = inputs["spending"].filter(["donor_code", "year"]).assign(factor=1.0)
+    arrays = project_arrays(
+        inputs={**inputs, "factors": {latest_year: unit}},
+        start_year=start_year,
+        end_year=end_year,
+        base_year=latest_year,
+        target_year=target_year,
+        rolling_window=rolling_window,
+        max_data_year=latest_year,
+    )
+    multipliers = _multipliers(variants, inputs, arrays, rolling_window)
+
+    # Every amount scales with the multiplier, while the ODA/GNI ratios do not
+    scaled = {key: arrays[key][None] * multipliers for key in ("gni", "oda", "target")}
+
+    charts = []
+    for i, (currency, prices, year) in enumerate(variants):
+        chart = arrays_to_chart(
+            {**arrays, **{key: value[i] for key, value in scaled.items()}}
+        ).pipe(clean_data_for_viz)
+        charts.append(
+            chart.assign(currency=currency, prices=prices, base_year=year).astype(
+                {"base_year": "Int64"}
+            )
+        )
+
+    return pd.concat(charts, ignore_index=True)
+
+
+if __name__ == "__main__":
+    from scripts.logger import configure_logging
+
+    configure_logging()
+    with trace_run("variants"):
+        df = chart_variants()
+        write_outputs(df, "eu27_chart_variants", formats=("csv",))
@@ -0,0 +1,17 @@
+import pytest
+
+from scripts.fixtures import Fixtures, use_fixtures
+from scripts.ms_analysis import fetch_projection_inputs
+
+
+@pytest.fixture(autouse=True)
+def fixtures():
+    """Every test runs against the deterministic fixtures (27 EU donors)."""
+    with use_fixtures(Fixtures()) as fixtures:
+        yield fixtures
+
+
+@pytest.fixture
+def inputs(fixtures):
+    """Projection inputs with the conversion factors of 2025."""
+    return fetch_projection_inputs()
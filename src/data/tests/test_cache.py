@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from scripts.cache import ODAQueryCache, TableCache, cached_table
+
+
+def _table(value: int) -> pd.DataFrame:
+    return pd.DataFrame({"year": [2020, 2021], "value": [value, value + 1]})
+
+
+def test_tables_are_stored_and_reloaded_from_disk(tmp_path):
+    cache = TableCache(tmp_path)
+    calls = []
+
+    @cached_table("growth", vintage=(2024, "October"), cache=cache)
+    def growth(from_year: int, donors: list[int] | None = None) -> pd.DataFrame:
+        calls.append(from_year)
+        return _table(from_year)
+
+    first = growth(2023, donors=[2, 1])
+    pd.testing.assert_frame_equal(growth(2023, donors=[1, 2]), first)
+    assert calls == [2023]
+
+    cache.clear()
+    pd.testing.assert_frame_equal(growth(2023, donors=[1, 2]), first)
+    assert calls == [2023]
+    assert len(list(tmp_path.glob("growth__*.parquet"))) == 1
+
+
+def test_new_vintage_replaces_old_files(tmp_path):
+    cache = TableCache(tmp_path)
+    cache.put("growth", (2024, "April"), (), _table(1))
+    cache.put("growth", (2024, "October"), (), _table(2))
+
+    assert [f.name.split("__")[1] for f in tmp_path.glob("growth__*")] == [
+        "2024_October"
+    ]
+
+
+def test_changed_code_is_not_served_an_old_table(tmp_path):
+    cache = TableCache(tmp_path)
+
+    @cached_table("growth", vintage=(2024, "October"), cache=cache)
+    def growth(from_year: int) -> pd.DataFrame:
+        return _table(from_year)
+
+    assert growth(2023)["value"].iloc[0] == 2023
+
+    @cached_table("growth", vintage=(2024, "October"), cache=cache)
+    def growth(from_year: int) -> pd.DataFrame:
+        return _table(from_year * 2)
+
+    assert growth(2023)["value"].iloc[0] == 4046
+    assert len(list(tmp_path.glob("growth__*.parquet"))) == 1
+
+
+class _Loader:
+    """ODAData stand-in that counts its loads and can hold them until released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, years, donors, indicators, currency) -> pd.DataFrame:
+        self.calls += 1
+        self.release.wait()
+        return pd.DataFrame(
+            [
+                (y, d, i, currency, float(y + d))
+                for y in years
+                for d in donors
+                for i in indicators
+            ],
+            columns=["year", "donor_code", "indicator", "currency", "value"],
+        )
+
+
+def test_subset_queries_are_served_from_memory():
+    loader = _Loader()
+    cache = ODAQueryCache(loader)
+    cache.query(range(2018, 2024), [1, 2, 3], ["oda", "gni"], "EUR")
+
+    df = cache.query(2020, [2], "gni", "EUR")
+
+    assert loader.calls == 1
+    assert df.to_dict("records") == [
+        {
+            "year": 2020,
+            "donor_code": 2,
+            "indicator": "gni",
+            "currency": "EUR",
+            "value": 2022.0,
+        }
+    ]
+
+    cache.query(2020, [2], "gni", "USD")
+    cache.query(2024, [2], "gni", "EUR")
+    assert cache.stats() == {"hits": 1, "misses": 3, "coalesced": 0}
+
+
+def test_concurrent_identical_queries_share_one_load():
+    loader = _Loader()
+    loader.release.clear()
+    cache = ODAQueryCache(loader)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(cache.query, [2022], [1], ["oda"]) for _ in range(4)]
+        while cache.stats()["coalesced"] < 3:
+            time.sleep(0.01)
+        loader.release.set()
+        results = [future.result() for future in futures]
+
+    assert loader.calls == 1
+    for df in results:
+        pd.testing.assert_frame_equal(df, results[0])
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from scripts import pipeline, prefetch
+from scripts.checkpoints import Checkpoints
+from scripts.config import Paths
+from scripts.eu_institutions import (
+    OWN_RESOURCES_CHECKPOINTS,
+    eu_own_resources_constant_eur,
+    own_resources_checkpoints,
+)
+from scripts.fixtures import Fixtures, use_fixtures
+
+
+@pytest.fixture
+def folders(tmp_path, monkeypatch):
+    """Checkpoints and pipeline outputs in a temporary folder."""
+    monkeypatch.setattr(Paths, "checkpoints", tmp_path / "checkpoints")
+    monkeypatch.setattr(Paths, "pipeline", tmp_path / "pipeline")
+    return tmp_path
+
+
+def test_resumed_run_loads_the_checkpoint(tmp_path):
+    checkpoints = Checkpoints("run", {"year": 2025}, folder=tmp_path)
+    df = pd.DataFrame({"value": [1.0, 2.0]}, index=[5, 6])
+
+    stored = checkpoints.load_or_run("frame", lambda: df)
+    assert checkpoints.stored("frame")
+
+    def fail() -> pd.DataFrame:
+        raise AssertionError("The checkpoint was recomputed")
+
+    pd.testing.assert_frame_equal(checkpoints.load_or_run("frame", fail), stored)
+    pd.testing.assert_frame_equal(stored, df.reset_index(drop=True))
+
+    checkpoints.clear()
+    assert not checkpoints.stored("frame")
+
+
+def test_runs_with_other_inputs_do_not_share_checkpoints(tmp_path):
+    folder = Checkpoints("run", {"year": 2025}, folder=tmp_path).folder
+
+    assert Checkpoints("run", {"year": 2025}, folder=tmp_path).folder == folder
+    assert Checkpoints("run", {"year": 2020}, folder=tmp_path).folder != folder
+    assert Checkpoints("other", {"year": 2025}, folder=tmp_path).folder != folder
+
+    own_resources = own_resources_checkpoints("eui_own_resources").folder
+    with use_fixtures(Fixtures(data_year=2024)):
+        assert own_resources_checkpoints("eui_own_resources").folder != own_resources
+
+
+def test_resumed_eui_stage_does_not_fetch_its_inputs(folders, monkeypatch):
+    expected = eu_own_resources_constant_eur(
+        checkpoints=own_resources_checkpoints("eui_own_resources")
+    )
+
+    def fail(**kwargs):
+        raise AssertionError("The inputs were fetched")
+
+    monkeypatch.setattr(prefetch, "prefetch", fail)
+
+    pd.testing.assert_frame_equal(pipeline._eui_own_resources(), expected)
+    assert not own_resources_checkpoints("eui_own_resources").stored(
+        *OWN_RESOURCES_CHECKPOINTS
+    )
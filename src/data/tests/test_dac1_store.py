@@ -0,0 +1,83 @@
+from functools import partial
+
+import pandas as pd
+import pytest
+
+from scripts import common, eu_institutions, sources
+from scripts.dac1_store import (
+    RAW_DAC1,
+    MissingYears,
+    read_dac1,
+    read_dac1_sdmx_filters,
+)
+
+
+def test_sdmx_filters_match_raw_table(tmp_path):
+    filters = {"flow_type": "1120", "measure": "2102", "price_base": "V"}
+    stored = read_dac1_sdmx_filters(
+        2019,
+        2022,
+        {**filters, "unit_measure": "USD"},
+        common.EU27,
+        store=tmp_path / "store",
+    )
+    raw = pd.read_parquet(RAW_DAC1).loc[
+        lambda d: d.year.between(2019, 2022)
+        & d.donor_code.isin(common.EU27)
+        & (d.flows_code == 1120)
+        & (d.aidtype_code == 2102)
+        & (d.amounttype_code == "A")
+    ]
+
+    key = ["year", "donor_code"]
+    pd.testing.assert_frame_equal(
+        stored.sort_values(key, ignore_index=True)[raw.columns],
+        raw.sort_values(key, ignore_index=True),
+        check_dtype=False,
+    )
+
+
+def test_store_is_rebuilt_when_the_source_changes(tmp_path):
+    store, source = tmp_path / "store", tmp_path / RAW_DAC1.name
+    raw = pd.read_parquet(RAW_DAC1)
+
+    raw.to_parquet(source)
+    assert not read_dac1(2023, 2023, store=store, source=source).empty
+
+    raw.loc[lambda d: d.year < 2023].to_parquet(source)
+    with pytest.raises(MissingYears):
+        read_dac1(2023, 2023, store=store, source=source)
+
+
+def test_unsupported_filters_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        read_dac1_sdmx_filters(
+            2022, 2022, {"unit_measure": "EUR"}, store=tmp_path / "store"
+        )
+
+
+def test_years_without_matching_rows_are_missing(tmp_path):
+    # The raw table has 2023, but no EU Institutions contributions for it yet
+    filters = {"flow_type": "1120", "measure": "2102", "price_base": "V"}
+    with pytest.raises(MissingYears, match="2023"):
+        read_dac1_sdmx_filters(2022, 2023, filters, store=tmp_path / "store")
+
+
+def test_contributions_missing_locally_are_downloaded(tmp_path, monkeypatch):
+    downloaded = []
+
+    def download_dac1(start_year, end_year, filters):
+        downloaded.append((start_year, end_year))
+        return pd.DataFrame({"donor_code": [4, 30_000], "year": [2023, 2023]})
+
+    monkeypatch.setattr(
+        eu_institutions,
+        "read_dac1_sdmx_filters",
+        partial(read_dac1_sdmx_filters, store=tmp_path / "store"),
+    )
+    monkeypatch.setattr(sources, "download_dac1", download_dac1)
+
+    df = eu_institutions.download_eu_x_eui(x=[4], start_year=2022, end_year=2023)
+
+    assert downloaded == [(2022, 2023)]
+    assert df.donor_code.tolist() == [4]
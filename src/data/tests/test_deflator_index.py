@@ -0,0 +1,60 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from scripts.config import Paths
+from scripts.deflator_index import DeflatorIndex, KeyIndex
+
+
+def test_maps_an_uncompressed_copy(tmp_path):
+    path = tmp_path / "pydeflate_dac1.feather"
+    shutil.copy(Paths.raw_data / "pydeflate_dac1.feather", path)
+    table = pd.read_feather(path)
+
+    DeflatorIndex(path)
+    allocated = pa.total_allocated_bytes()
+    index = DeflatorIndex(path)
+
+    # Reading the mapped copy takes no Arrow memory, and the values are views of it
+    assert pa.total_allocated_bytes() == allocated
+    assert not index.columns["exchange"].flags.owndata
+    np.testing.assert_array_equal(
+        index.lookup(table.iso_code, table.year.dt.year), table.deflator.to_numpy()
+    )
+
+
+def test_copy_is_rewritten_when_the_table_changes(tmp_path):
+    path = tmp_path / "pydeflate_dac1.feather"
+    table = pd.read_feather(Paths.raw_data / "pydeflate_dac1.feather")
+    table.to_feather(path)
+    DeflatorIndex(path)
+
+    table.assign(deflator=table.deflator * 2).to_feather(path)
+    np.testing.assert_array_equal(
+        DeflatorIndex(path).lookup(table.iso_code, table.year.dt.year),
+        table.deflator.to_numpy() * 2,
+    )
+
+
+def test_key_index_matches_merge(inputs):
+    factors = inputs["factors"][2025]
+    rows = (
+        inputs["spending"].filter(["donor_code", "year"]).sample(frac=1, random_state=0)
+    )
+    np.testing.assert_array_equal(
+        KeyIndex(factors.donor_code, factors.year).take(
+            factors.factor.to_numpy(), rows.donor_code, rows.year
+        ),
+        rows.merge(factors, how="left")["factor"].to_numpy(),
+    )
+
+
+def test_key_index_skips_missing_ids():
+    # Without the check, the missing id would overwrite the offset of the last id
+    index = KeyIndex([1.0, 2.0, np.nan], [2020, 2021, 2021])
+
+    np.testing.assert_array_equal(
+        index.get([1.0, 2.0, 2.0, np.nan], [2020, 2020, 2021, 2021]), [0, -1, 1, -1]
+    )
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from scripts.eu_institutions import (
+    eui_key_numbers,
+    eui_key_numbers_windows,
+    eui_mff_period,
+    eui_mff_periods,
+    eui_spending_chart,
+)
+from scripts.ms_analysis import main_column_chart_with_projections
+
+
+@pytest.fixture
+def charts(inputs):
+    members = main_column_chart_with_projections(inputs=inputs)
+    return members, eui_spending_chart(members)
+
+
+def test_key_numbers_windows_match_single_windows(charts):
+    _, eui = charts
+    windows = eui_key_numbers_windows(eui)
+
+    for row in windows.sample(10, random_state=0).to_dict("records"):
+        expected = eui_key_numbers(eui, row.pop("period_start"), row.pop("period_end"))
+        pd.testing.assert_series_equal(pd.Series(row), pd.Series(expected))
+
+
+def test_mff_periods_match_single_period(charts):
+    members, eui = charts
+    periods = eui_mff_periods(members, eui, [(2028, 2034)])
+
+    pd.testing.assert_series_equal(
+        periods.iloc[0, -2:],
+        pd.Series(eui_mff_period(members, eui), index=periods.columns[-2:]),
+        check_names=False,
+    )
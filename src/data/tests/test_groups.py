@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+from scripts import common
+from scripts.groups import standard_groups
+
+
+@pytest.mark.parametrize(
+    "name, members", [("EU28", "EU28"), ("Lower target", "LOWER_TARGET_COUNTRIES")]
+)
+def test_group_sum_matches_groupby(inputs, name, members):
+    members = getattr(common, members)
+    spending = inputs["spending"]
+    totals = standard_groups().sum(spending, "gni").set_index(["group", "year"])
+
+    pd.testing.assert_series_equal(
+        totals.loc[name, "gni"],
+        spending.loc[spending.donor_code.isin(members)].groupby("year")["gni"].sum(),
+        check_dtype=False,
+    )
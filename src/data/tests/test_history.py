@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from scripts.fixtures import Fixtures, use_fixtures
+from scripts.history import update_projection_inputs
+from scripts.ms_analysis import (
+    fetch_projection_inputs,
+    main_column_chart_with_projections,
+)
+
+KEY = ["donor_code", "year"]
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(KEY, ignore_index=True)
+
+
+def _assert_same_inputs(stored: dict, fetched: dict, base_years: list[int]) -> None:
+    pd.testing.assert_frame_equal(
+        _sorted(stored["spending"]),
+        _sorted(fetched["spending"])[stored["spending"].columns],
+        check_dtype=False,
+    )
+    for base_year in base_years:
+        pd.testing.assert_frame_equal(
+            _sorted(stored["factors"][base_year]),
+            _sorted(fetched["factors"][base_year]),
+            check_dtype=False,
+        )
+
+
+def test_stored_history_matches_a_fetch(tmp_path):
+    stored = update_projection_inputs(base_years=[2020, 2025], folder=tmp_path)
+    again = update_projection_inputs(base_years=[2020, 2025], folder=tmp_path)
+
+    _assert_same_inputs(stored, fetch_projection_inputs(base_years=[2020, 2025]), [])
+    _assert_same_inputs(again, stored, [2020, 2025])
+
+
+@pytest.mark.parametrize("base_year", [2020, 2025])
+def test_incremental_run_matches_a_clean_run_after_a_new_year(tmp_path, base_year):
+    update_projection_inputs(base_years=base_year, folder=tmp_path)
+
+    with use_fixtures(Fixtures(data_year=2024)):
+        incremental = update_projection_inputs(base_years=base_year, folder=tmp_path)
+        clean = fetch_projection_inputs(base_years=base_year)
+
+        assert incremental["spending"].year.max() == 2024
+        _assert_same_inputs(incremental, clean, [base_year])
+        pd.testing.assert_frame_equal(
+            main_column_chart_with_projections(base_year=base_year, inputs=incremental),
+            main_column_chart_with_projections(base_year=base_year, inputs=clean),
+        )
@@ -0,0 +1,24 @@
+from scripts import common, horizon, sources
+from scripts.cache import oda_cache
+from scripts.fixtures import Fixtures, use_fixtures
+
+
+def test_latest_year_is_detected_from_the_source():
+    assert horizon.max_data_year() == 2023
+
+    with use_fixtures(Fixtures(data_year=2025)):
+        assert horizon.max_data_year() == 2025
+
+
+def test_years_with_missing_members_are_not_complete(fixtures, monkeypatch):
+    late = common.EU27[0]
+
+    def oda_data(years, donors, indicators, currency):
+        df = fixtures.oda(years, donors, indicators, currency)
+        return df.loc[lambda d: ~(d.donor_code.eq(late) & d.year.eq(2023))]
+
+    monkeypatch.setattr(sources, "oda_data", oda_data)
+    oda_cache.clear()
+
+    assert horizon.max_data_year(known=2020) == 2022
+    assert horizon.max_data_year(known=2023) == 2023
@@ -0,0 +1,8 @@
+import pytest
+
+from scripts.benchmark import IMPORT_TIME_MODULES, import_time
+
+
+@pytest.mark.parametrize("module", IMPORT_TIME_MODULES)
+def test_analysis_modules_do_not_load_the_sources(module):
+    assert import_time(module)["heavy_loaded"] == []
@@ -0,0 +1,63 @@
+import json
+import subprocess
+import sys
+
+import pandas as pd
+
+from scripts.config import Paths
+from scripts.instrumentation import instrument, trace_run
+
+
+@instrument
+def _outer(df: pd.DataFrame) -> pd.DataFrame:
+    return _inner(df).assign(b=1)
+
+
+@instrument
+def _inner(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat([df, df], ignore_index=True)
+
+
+def test_trace_records_nested_stages(tmp_path):
+    with trace_run("test", folder=tmp_path, memory=False) as records:
+        _outer(pd.DataFrame({"a": range(10)}))
+
+    assert [(r["stage"], r["parent"], r["depth"]) for r in records] == [
+        ("_inner", "_outer", 1),
+        ("_outer", None, 0),
+    ]
+    assert [(r["rows_in"], r["rows_out"]) for r in records] == [(10, 20), (10, 20)]
+    assert all(r["memory_out_mb"] > 0 for r in records)
+
+    (trace,) = tmp_path.glob("test_*.json")
+    assert json.loads(trace.read_text())["status"] == "completed"
+
+
+def test_memory_is_only_measured_when_tracing(monkeypatch):
+    measured = []
+    memory_usage = pd.DataFrame.memory_usage
+
+    def spy(self, *args, **kwargs):
+        measured.append(len(self))
+        return memory_usage(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "memory_usage", spy)
+    _outer(pd.DataFrame({"a": range(10)}))
+
+    assert measured == []
+
+
+def test_importing_the_package_leaves_logging_alone():
+    code = (
+        "import logging, scripts.ms_analysis, scripts.service\n"
+        "root = logging.getLogger()\n"
+        "print(root.level == logging.WARNING and not root.handlers)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Paths.app_data,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "True"
@@ -0,0 +1,47 @@
+import io
+
+import pandas as pd
+
+from scripts import loaders, pipeline
+from scripts.config import Paths
+from scripts.pipeline import Stage
+
+
+def _stage(folder, runs: list) -> Stage:
+    output = folder / "chart.parquet"
+
+    def run() -> pd.DataFrame:
+        runs.append(1)
+        print("Reading the source data")
+        df = pd.DataFrame({"Year": [2028, 2029], "ODA": [1.5, 2.5]})
+        df.to_parquet(output)
+        return df
+
+    return Stage("chart", run=run, outputs=[output])
+
+
+def test_load_runs_the_stage_once_and_keeps_stdout_clean(tmp_path, monkeypatch, capsys):
+    runs = []
+    stages = [_stage(tmp_path, runs)]
+    monkeypatch.setattr(Paths, "pipeline_state", tmp_path / "state.json")
+    monkeypatch.setattr(pipeline, "STAGES", stages)
+    monkeypatch.setattr(loaders, "STAGES", stages)
+
+    first = loaders.load("chart")
+    second = loaders.load("chart")
+
+    assert len(runs) == 1
+    pd.testing.assert_frame_equal(first, second)
+    out, err = capsys.readouterr()
+    assert out == ""
+    assert "Reading the source data" in err
+
+
+def test_write_stdout_streams_the_csv(capsysbinary):
+    df = pd.DataFrame({"Year": [2028, 2029], "ODA": [1.5, 2.5]})
+
+    loaders.write_stdout(df)
+
+    out = capsysbinary.readouterr().out
+    assert out == df.to_csv(index=False).encode()
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(out)), df)
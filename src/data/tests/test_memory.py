@@ -0,0 +1,14 @@
+from scripts.benchmark import (
+    MEMORY_BUDGET_DONORS,
+    MEMORY_BUDGET_MB,
+    check_memory_budget,
+)
+
+
+def test_member_states_chart_stays_within_the_memory_budget():
+    memory = check_memory_budget(MEMORY_BUDGET_DONORS, MEMORY_BUDGET_MB)
+
+    assert not memory["over_budget"], (
+        f"Peak memory at {memory['donors']} donors was "
+        f"{memory['peak_memory_mb']:.1f}MB (budget {MEMORY_BUDGET_MB:.0f}MB)"
+    )
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import horizon
+from scripts.ms_analysis import (
+    _interpolate_gni_projections,
+    main_column_chart_with_projections,
+)
+
+
+def test_interpolation_is_linear_per_donor():
+    df = pd.DataFrame(
+        {
+            "year": [2020, 2024, 2020, 2022],
+            "donor_code": [1, 1, 2, 2],
+            "oda_gni_ratio": [0.3, 0.7, 0.5, 0.5],
+        }
+    )
+    wide = _interpolate_gni_projections(df, 2020, 2025).pivot(
+        index="year", columns="donor_code", values="oda_gni_ratio"
+    )
+
+    np.testing.assert_allclose(wide[1], [0.3, 0.4, 0.5, 0.6, 0.7, 0.7])
+    np.testing.assert_allclose(wide[2], [0.5] * 6)
+
+
+@pytest.mark.parametrize("engine", ["pandas", "numpy"])
+def test_target_year_in_the_data_is_rejected(engine):
+    with pytest.raises(ValueError, match="must be after the latest year"):
+        main_column_chart_with_projections(
+            target_year=horizon.max_data_year(), engine=engine
+        )
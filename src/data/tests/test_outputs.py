@@ -0,0 +1,62 @@
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.outputs import encode, write_if_changed, write_outputs
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Member State": ["Austria", "Belgium"],
+            "Year": [2028, 2028],
+            "ODA": [1.5, None],
+        }
+    )
+
+
+def test_encoded_formats_match_pandas(df, tmp_path):
+    content = encode(df, formats=("parquet", "csv", "json"))
+
+    df.to_parquet(tmp_path / "expected.parquet")
+    assert content["parquet"] == (tmp_path / "expected.parquet").read_bytes()
+    assert content["csv"] == df.to_csv(index=False).encode()
+    pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(content["parquet"])), df)
+    assert json.loads(content["json"])[1] == {
+        "Member State": "Belgium",
+        "Year": 2028,
+        "ODA": None,
+    }
+
+    with pytest.raises(ValueError):
+        encode(df, formats=("xlsx",))
+
+
+def test_unchanged_content_is_not_rewritten(tmp_path):
+    path = tmp_path / "out" / "chart.csv"
+
+    assert write_if_changed(path, b"a,b\n1,2\n")
+    os.utime(path, ns=(0, 0))
+
+    assert not write_if_changed(path, b"a,b\n1,2\n")
+    assert path.stat().st_mtime_ns == 0
+
+    assert write_if_changed(path, b"a,b\n1,3\n")
+    assert path.read_bytes() == b"a,b\n1,3\n"
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_only_changed_outputs_are_rewritten(df, tmp_path):
+    written = write_outputs(df, "chart", folder=tmp_path)
+    assert written == {tmp_path / "chart.parquet": True, tmp_path / "chart.csv": True}
+
+    assert not any(write_outputs(df, "chart", folder=tmp_path).values())
+
+    changed = df.assign(ODA=lambda d: d.ODA.fillna(np.pi))
+    assert all(write_outputs(changed, "chart", folder=tmp_path).values())
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "chart.parquet"), changed)
@@ -0,0 +1,59 @@
+import pandas as pd
+
+from scripts.pipeline import STAGES, Stage, code_modules, run_pipeline
+
+
+def test_stage_code_includes_imported_modules():
+    member_states = next(s for s in STAGES if s.name == "member_states")
+    modules = code_modules(member_states.code)
+
+    assert {"checkpoints", "groups", "instrumentation", "targets", "tools"} <= set(
+        modules
+    )
+    assert "eu_institutions" not in modules
+
+
+def _stages(folder) -> list[Stage]:
+    source, raw, total = folder / "source.txt", folder / "raw.csv", folder / "total.csv"
+
+    def read() -> pd.DataFrame:
+        df = pd.DataFrame({"value": [int(v) for v in source.read_text().split()]})
+        df.to_csv(raw, index=False)
+        return df
+
+    def add(upstream: dict) -> pd.DataFrame:
+        df = upstream["read"]
+        df = pd.read_csv(raw) if df is None else df
+        df = df.sum().to_frame().T
+        df.to_csv(total, index=False)
+        return df
+
+    return [
+        Stage("read", run=read, outputs=[raw], files=(source,)),
+        Stage("add", run=add, outputs=[total], depends_on=("read",)),
+    ]
+
+
+def test_only_stages_whose_inputs_changed_rerun(tmp_path):
+    state = tmp_path / "state.json"
+    stages = _stages(tmp_path)
+    (tmp_path / "source.txt").write_text("1 2 3")
+
+    assert run_pipeline(stages, state_file=state) == {"read": "ran", "add": "ran"}
+    assert run_pipeline(stages, state_file=state) == {
+        "read": "skipped",
+        "add": "skipped",
+    }
+
+    (tmp_path / "source.txt").write_text("1 2 4")
+    assert run_pipeline(stages, state_file=state) == {"read": "ran", "add": "ran"}
+    assert pd.read_csv(tmp_path / "total.csv")["value"].item() == 7
+
+    (tmp_path / "total.csv").unlink()
+    assert run_pipeline(stages, state_file=state) == {
+        "read": "skipped",
+        "add": "ran",
+    }
+    assert run_pipeline(stages, state_file=state, targets=["read"], force=True) == {
+        "read": "ran"
+    }
@@ -0,0 +1,35 @@
+import time
+
+import pandas as pd
+
+from scripts.cache import oda_cache
+from scripts.fixtures import Fixtures, use_fixtures
+from scripts.ms_analysis import get_total_oda_and_gni
+from scripts.prefetch import prefetch
+
+
+def _timed_prefetch(max_workers: int | None) -> tuple[dict, float]:
+    # Fresh fixtures, so every load goes to the (slow) sources
+    with use_fixtures(Fixtures(latency=0.1)):
+        start = time.perf_counter()
+        data = prefetch(max_workers=max_workers)
+        return data, time.perf_counter() - start
+
+
+def test_concurrent_prefetch_matches_sequential_and_is_faster():
+    sequential, sequential_time = _timed_prefetch(max_workers=1)
+    concurrent, concurrent_time = _timed_prefetch(max_workers=None)
+
+    assert sequential.keys() == concurrent.keys()
+    for name in sequential:
+        pd.testing.assert_frame_equal(sequential[name], concurrent[name])
+    assert concurrent_time < sequential_time / 2
+
+
+def test_prefetch_warms_the_oda_cache():
+    prefetch(eu_institutions=False)
+    misses = oda_cache.stats()["misses"]
+
+    get_total_oda_and_gni(years=list(range(2014, 2024)), currency="EUR")
+
+    assert oda_cache.stats()["misses"] == misses
@@ -0,0 +1,15 @@
+import pandas as pd
+import pytest
+
+from scripts.ms_analysis import main_column_chart_with_projections
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"target_year": 2032, "rolling_window": 2, "base_year": 2022}]
+)
+def test_numpy_engine_matches_pandas(kwargs):
+    pd.testing.assert_frame_equal(
+        main_column_chart_with_projections(**kwargs),
+        main_column_chart_with_projections(engine="numpy", **kwargs),
+        check_dtype=False,
+    )
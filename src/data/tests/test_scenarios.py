@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from scripts.ms_analysis import main_column_chart_with_projections
+from scripts.scenarios import scenario_grid, scenario_sweep
+
+
+def test_grid_fills_in_defaults():
+    assert scenario_grid({"target_year": [2030, 2032]}) == [
+        {"target_year": 2030, "base_year": 2025, "rolling_window": 3, "end_year": 2034},
+        {"target_year": 2032, "base_year": 2025, "rolling_window": 3, "end_year": 2034},
+    ]
+
+    with pytest.raises(ValueError, match="Unknown scenario parameters"):
+        scenario_grid({"discount_rate": [0.03]})
+
+
+def test_sweep_matches_single_runs(inputs):
+    sweep = scenario_sweep(
+        {"target_year": [2030, 2032]}, inputs=inputs, max_workers=1
+    ).reset_index()
+
+    for target_year in (2030, 2032):
+        expected = main_column_chart_with_projections(
+            target_year=target_year, inputs=inputs
+        )
+        pd.testing.assert_frame_equal(
+            sweep.loc[sweep.target_year == target_year, expected.columns].reset_index(
+                drop=True
+            ),
+            expected,
+        )
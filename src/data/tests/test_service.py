@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from scripts import horizon
+from scripts.ms_analysis import main_column_chart_with_projections
+from scripts.service import ScenarioService
+
+
+def test_chart_matches_numpy_engine(inputs):
+    pd.testing.assert_frame_equal(
+        ScenarioService(inputs=inputs).chart(),
+        main_column_chart_with_projections(inputs=inputs, engine="numpy"),
+    )
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "target_year=1990",
+        "target_year=latest",
+        "target_year=2100",
+        "target_year=soon",
+        "base_year=1990",
+        "base_year=2100",
+        "window=2020-2100",
+        "members=Atlantis",
+    ],
+)
+def test_invalid_queries_are_rejected(inputs, query):
+    query = query.replace("latest", str(horizon.max_data_year()))
+    status, _, _ = ScenarioService(inputs=inputs).handle(f"/mff?{query}")
+    assert status == 400
+
+
+def test_factors_cache_is_bounded(inputs):
+    service = ScenarioService(inputs=inputs, cache_size=2)
+    for base_year in range(2014, 2018):
+        assert service.handle(f"/chart?base_year={base_year}")[0] == 200
+
+    assert len(service.factors._memory) == 2
+    assert list(inputs["factors"]) == [2025]
+
+
+def test_errors_are_internal_server_errors(inputs):
+    service = ScenarioService(inputs=inputs)
+    service.chart = None
+    assert service.handle("/chart")[0] == 500
+
+
+def test_etag_revalidation(inputs):
+    service = ScenarioService(inputs=inputs)
+    status, headers, _ = service.handle("/chart?target_year=2031")
+    assert status == 200
+
+    status, _, body = service.handle("/chart?target_year=2031", headers["ETag"])
+    assert (status, body) == (304, b"")
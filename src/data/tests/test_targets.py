@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import common, horizon
+from scripts.fixtures import Fixtures, use_fixtures
+from scripts.ms_analysis import (
+    fetch_projection_inputs,
+    main_column_chart_with_projections,
+)
+from scripts.projection_core import project_arrays
+from scripts.targets import default_targets, read_targets, target_array
+
+
+def test_reads_names_and_codes(tmp_path):
+    path = tmp_path / "targets.json"
+    path.write_text(json.dumps({"Austria": 0.007, "Malta": 0.0033, "20": 0.01}))
+
+    assert read_targets(path) == {1: 0.007, 45: 0.0033, 20: 0.01}
+
+
+def test_unknown_donors_are_rejected(tmp_path):
+    path = tmp_path / "targets.json"
+    path.write_text(json.dumps({"Austria": 0.007, "Atlantis": 0.007}))
+
+    with pytest.raises(ValueError, match="Atlantis"):
+        read_targets(path)
+
+
+def test_default_targets_are_the_published_table():
+    targets = default_targets()
+
+    assert targets == read_targets()
+    assert {
+        code for code, target in targets.items() if target == common.LOWER_TARGET
+    } == (common.LOWER_TARGET_COUNTRIES)
+
+
+def test_default_targets_are_reread_when_the_file_changes(tmp_path):
+    path = tmp_path / "targets.json"
+    path.write_text(json.dumps({"Austria": 0.007}))
+    assert default_targets(path) == {1: 0.007}
+
+    path.write_text(json.dumps({"Austria": 0.0075}))
+    assert default_targets(path) == {1: 0.0075}
+
+
+def test_donors_missing_from_the_table_get_the_target():
+    np.testing.assert_array_equal(
+        target_array([1, 45, 701], {45: 0.0033}), [common.TARGET, 0.0033, common.TARGET]
+    )
+
+
+def test_default_donors_and_targets():
+    pd.testing.assert_frame_equal(
+        main_column_chart_with_projections(
+            donors=common.EU27, targets=default_targets()
+        ),
+        main_column_chart_with_projections(),
+    )
+
+
+def test_engines_agree_on_other_donors_and_targets():
+    targets = {**default_targets(), common.DAC_MEMBERS[0]: 0.01}
+    dac = fetch_projection_inputs(donors=common.DAC_MEMBERS)
+    pd.testing.assert_frame_equal(
+        main_column_chart_with_projections(
+            inputs=dac, targets=targets, total_name="DAC"
+        ),
+        main_column_chart_with_projections(
+            inputs=dac, targets=targets, total_name="DAC", engine="numpy"
+        ),
+        check_dtype=False,
+    )
+
+
+def test_donors_outside_the_eu_are_projected():
+    with use_fixtures(Fixtures(donors=len(common.EU27) + 3)):
+        arrays = project_arrays(
+            inputs=fetch_projection_inputs(donors=common.DAC_MEMBERS),
+            start_year=2014,
+            end_year=2034,
+            base_year=2025,
+            target_year=2030,
+            rolling_window=3,
+            max_data_year=horizon.max_data_year(),
+        )
+
+    non_eu = ~np.isin(arrays["donors"], common.EU27 + [20918])
+    assert non_eu.any()
+    assert np.isfinite(arrays["gni"][non_eu]).all()
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts import horizon
+from scripts.tools import (
+    extend_deflators_to_year,
+    get_gdp_growth_factor,
+    to_constant,
+)
+
+
+def _deflators(last_years: dict) -> pd.DataFrame:
+    rows = [
+        (code, iso, pd.Timestamp(year, 1, 1), 100.0 + (year - 2014) * (1 + year % 3))
+        for (code, iso), last_year in last_years.items()
+        for year in range(2015, last_year + 1)
+    ]
+    return pd.DataFrame(rows, columns=["dac_code", "iso_code", "year", "value"])
+
+
+def _assert_matches_reference(data: pd.DataFrame, window: int) -> None:
+    pd.testing.assert_frame_equal(
+        extend_deflators_to_year(data, 2034, window, method="reference"),
+        extend_deflators_to_year(data, 2034, window),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize("window", [1, 3, 5])
+def test_extend_deflators_matches_reference(window):
+    growth = get_gdp_growth_factor(from_year=horizon.max_data_year())
+    _assert_matches_reference(growth, window)
+
+
+@pytest.mark.parametrize("window", [1, 3, 5])
+def test_extend_deflators_heterogeneous_last_years(window):
+    data = _deflators({(1, "AUT"): 2029, (2, "BEL"): 2027, (3, "CAN"): 2025})
+    _assert_matches_reference(data, window)
+
+    extended = extend_deflators_to_year(data, 2034, window)
+    assert (extended.groupby("dac_code").year.max() == 2034).all()
+    assert not extended.duplicated(["dac_code", "year"]).any()
+
+
+@pytest.mark.parametrize("window", [1, 3, 5])
+def test_extend_deflators_missing_values(window):
+    data = _deflators({(1, "AUT"): 2029, (2, "BEL"): 2027, (3, None): 2028})
+    data.loc[data.year.dt.year.isin([2018, 2026]), "value"] = np.nan
+    data = data.drop(data.index[(data.dac_code == 2) & (data.year.dt.year == 2025)])
+
+    _assert_matches_reference(data, window)
+
+
+def _spending() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "donor_code": [1, 1, 2],
+            "year": [2022, 2023, 2023],
+            "oda": [10.0, 20.0, 30.0],
+            "grants": [1.0, 2.0, np.nan],
+        }
+    )
+
+
+def _factors() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"donor_code": [2, 1, 1], "year": [2023, 2023, 2022], "factor": [3.0, 2.0, 0.5]}
+    )
+
+
+def test_to_constant_converts_a_list_of_columns_in_place():
+    converted = to_constant(
+        _spending(), source_column=["oda", "grants"], factors=_factors()
+    )
+
+    np.testing.assert_allclose(converted["oda"], [5.0, 40.0, 90.0])
+    np.testing.assert_allclose(converted["grants"], [0.5, 4.0, np.nan])
+
+
+def test_to_constant_writes_target_columns():
+    converted = to_constant(
+        _spending(),
+        source_column=["oda", "grants"],
+        target_column=["oda_constant", "grants_constant"],
+        factors=_factors(),
+    )
+
+    np.testing.assert_allclose(converted["oda"], [10.0, 20.0, 30.0])
+    np.testing.assert_allclose(converted["oda_constant"], [5.0, 40.0, 90.0])
+
+    with pytest.raises(ValueError, match="same length"):
+        to_constant(
+            _spending(),
+            source_column=["oda", "grants"],
+            target_column="oda_constant",
+            factors=_factors(),
+        )
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from scripts.ms_analysis import (
+    calculate_mff_total_ms,
+    main_column_chart_with_projections,
+)
+from scripts.uncertainty import monte_carlo_mff_totals
+
+
+def test_without_shocks_every_path_is_the_projection(inputs):
+    bands = monte_carlo_mff_totals(draws=4, volatility=0.0, inputs=inputs).query(
+        "indicator == 'ODA'"
+    )
+    expected = calculate_mff_total_ms(
+        main_column_chart_with_projections(inputs=inputs)
+    ).set_index("Member State")["ODA"]
+
+    pd.testing.assert_series_equal(
+        bands.set_index("Member State")["p50"].iloc[1:],
+        expected.loc[bands["Member State"].iloc[1:]],
+        check_names=False,
+        rtol=1e-4,
+    )
+
+
+def test_bands_are_ordered_and_reproducible(inputs):
+    kwargs = {"draws": 50, "seed": 1, "volatility": 0.02, "inputs": inputs}
+    bands = monte_carlo_mff_totals(chunk_size=1_000, **kwargs)
+    oda = bands.query("indicator == 'ODA'")
+
+    assert (oda.p5 <= oda.p50).all() and (oda.p50 <= oda.p95).all()
+    assert (oda.p95 > oda.p5).any()
+    pd.testing.assert_frame_equal(bands, monte_carlo_mff_totals(chunk_size=7, **kwargs))
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from scripts import horizon, sources
+from scripts.common import WEO_DEFLATORS_VINTAGE
+from scripts.ms_analysis import (
+    fetch_projection_inputs,
+    main_column_chart_with_projections,
+)
+from scripts.tools import add_dac_codes, add_member_state_names
+from scripts.variants import chart_variants
+
+INDEX = ["Member State", "Year"]
+
+
+def test_constant_variants_match_a_run_at_each_base_year():
+    inputs = fetch_projection_inputs(base_years=[2020, 2025])
+    variants = chart_variants(
+        [
+            ("EUR", "constant", 2020),
+            ("EUR", "constant", 2025),
+            ("USD", "current", None),
+        ],
+        inputs=inputs,
+    )
+
+    for base_year in (2020, 2025):
+        expected = main_column_chart_with_projections(
+            base_year=base_year, inputs=inputs
+        )
+        pd.testing.assert_frame_equal(
+            variants.loc[variants.base_year == base_year, expected.columns].reset_index(
+                drop=True
+            ),
+            expected,
+            check_dtype=False,
+        )
+
+
+def _gdp_inflation(latest_year: int) -> pd.Series:
+    """WEO GDP deflators relative to the latest data year."""
+    weo = sources.world_economic_outlook(*WEO_DEFLATORS_VINTAGE)
+    weo.load_data(["NGDP_D"])
+    prices = (
+        weo.get_data("NGDP_D")
+        .pipe(add_dac_codes)
+        .rename(columns={"dac_code": "donor_code"})
+        .pipe(add_member_state_names)
+        .assign(Year=lambda d: d.year.dt.year)
+        .set_index(INDEX)["value"]
+    )
+    base = prices.xs(latest_year, level="Year")
+    return prices / base.reindex(prices.index.get_level_values(0)).to_numpy()
+
+
+def test_current_variant_inflates_projections_with_gdp_deflators():
+    latest_year = horizon.max_data_year()
+    inputs = fetch_projection_inputs(base_years=latest_year)
+    current = chart_variants([("EUR", "current", None)], inputs=inputs).set_index(
+        INDEX
+    )["ODA"]
+    constant = main_column_chart_with_projections(
+        base_year=latest_year, inputs=inputs
+    ).set_index(INDEX)["ODA"]
+    inflation = _gdp_inflation(latest_year)
+
+    years = current.index.get_level_values("Year")
+    projected = inflation.index.intersection(current.index[years > latest_year])
+    np.testing.assert_allclose(
+        current.loc[projected], (constant * inflation).loc[projected], atol=2
+    )
+
+
+def test_current_variant_reports_current_values():
+    inputs = fetch_projection_inputs(base_years=horizon.max_data_year())
+    current = chart_variants([("EUR", "current", None)], inputs=inputs).set_index(
+        INDEX
+    )["ODA"]
+    reported = (
+        inputs["spending"]
+        .pipe(add_member_state_names)
+        .rename(columns={"year": "Year"})
+        .set_index(INDEX)["total_oda_official_definition"]
+    )
+    reported = reported.loc[reported.index.isin(current.index)]
+
+    np.testing.assert_allclose(current.loc[reported.index], reported, atol=0.5)